@@ -0,0 +1,227 @@
+"""
+ASX Stock Screener - Alert Rules
+Declarative watchlist/alert rules evaluated against scored snapshots.
+
+A rule is a dict (alert_rules.json holds a list of them):
+
+    {"name": "Enters top 20", "column": "rank", "op": "<=", "value": 20}
+    {"name": "Near 52w low", "column": "range_position_pct", "op": "<", "value": 10}
+    {"name": "Shorts covering", "column": "short_absolute_change", "op": "<", "value": -1}
+    {"name": "Watchlist declining shorts", "column": "short_trend", "op": "==",
+     "value": "↓ Declining", "tickers": ["BHP.AX", "CSL.AX"]}
+
+Rules are compiled so all rules sharing a (column, op) are checked in one
+broadcast comparison. An alert fires only on a transition: the condition
+holds in the current snapshot but did not hold for that ticker in the
+previous one. Fired alerts are appended as JSON lines to the outbox file.
+"""
+
+import json
+import operator
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from snapshot_store import SNAPSHOT_DIR, list_snapshots, load_snapshot, read_metadata, read_table
+
+RULES_PATH = os.environ.get('ASX_ALERT_RULES', 'alert_rules.json')
+OUTBOX_PATH = os.environ.get('ASX_ALERT_OUTBOX', 'alerts_outbox.jsonl')
+
+RULE_OPS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+ORDERING_OPS = {'<', '<=', '>', '>='}
+
+
+class CompiledRules:
+    """
+    Rules grouped by (column, op) with their thresholds as arrays, so one
+    numpy comparison evaluates a whole group for every ticker
+    """
+
+    def __init__(self, rules: List[Dict]):
+        for i, rule in enumerate(rules):
+            missing = [key for key in ('name', 'column', 'op', 'value') if key not in rule]
+            if missing:
+                raise ValueError(f"Rule {i} is missing {missing}: {rule}")
+            if rule['op'] not in RULE_OPS:
+                raise ValueError(f"Rule {rule['name']!r} has unknown op {rule['op']!r}; "
+                                 f"expected one of {list(RULE_OPS)}")
+
+        self.rules = list(rules)
+        self.names = [rule['name'] for rule in rules]
+        # Snapshot columns the rules read (ticker aligns snapshots and applies watchlists)
+        self.columns = list(dict.fromkeys(['ticker'] + [rule['column'] for rule in rules]))
+
+        self.groups = {}
+        for i, rule in enumerate(rules):
+            self.groups.setdefault((rule['column'], rule['op']), []).append(i)
+        self.thresholds = {
+            key: np.array([rules[i]['value'] for i in indices], dtype=object)
+            for key, indices in self.groups.items()
+        }
+
+        # Watchlist rules: rule index -> allowed tickers
+        self.watchlists = {
+            i: set(rule['tickers']) for i, rule in enumerate(rules) if rule.get('tickers')
+        }
+
+    def evaluate(self, df: pd.DataFrame) -> np.ndarray:
+        """Boolean matrix (tickers x rules): does each rule's condition hold now"""
+        matches = np.zeros((len(df), len(self.rules)), dtype=bool)
+
+        for (column, op), indices in self.groups.items():
+            if column not in df.columns:
+                print(f"  ! Alert column {column!r} not in snapshot; "
+                      f"rules {[self.names[i] for i in indices]} skipped")
+                continue
+
+            series = df[column]
+            numeric = pd.api.types.is_numeric_dtype(series)
+            if op in ORDERING_OPS and not numeric:
+                raise ValueError(f"Op {op!r} needs a numeric column, {column!r} is {series.dtype}")
+
+            if numeric:
+                values = series.to_numpy(dtype='float64', na_value=np.nan)
+                thresholds = self.thresholds[(column, op)].astype('float64')
+            else:
+                values = series.astype(object).to_numpy()
+                thresholds = self.thresholds[(column, op)]
+
+            # (tickers x 1) vs (1 x rules in group); NaN never matches
+            result = RULE_OPS[op](values[:, None], thresholds[None, :])
+            if numeric:
+                result &= ~np.isnan(values)[:, None]
+            matches[:, indices] = result
+
+        if self.watchlists:
+            tickers = df['ticker'].to_numpy()
+            for i, allowed in self.watchlists.items():
+                matches[:, i] &= np.isin(tickers, list(allowed))
+
+        return matches
+
+
+def load_rules(path: str = RULES_PATH) -> List[Dict]:
+    """Load a JSON list of rules"""
+    with open(path, encoding='utf-8') as f:
+        rules = json.load(f)
+    if not isinstance(rules, list):
+        raise ValueError(f"{path} must contain a JSON list of rules")
+    return rules
+
+
+def fire_alerts(compiled: CompiledRules, current: pd.DataFrame,
+                previous: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Alerts for conditions that hold in `current` but did not for the same
+    ticker in `previous`. With no previous snapshot nothing fires (the
+    current snapshot becomes the baseline)
+    """
+    columns = ['ticker', 'rule', 'column', 'op', 'threshold', 'value']
+    if previous is None or current.empty:
+        return pd.DataFrame(columns=columns)
+
+    now = compiled.evaluate(current)
+    before = compiled.evaluate(previous)
+
+    # Align the previous snapshot's rows to the current tickers
+    positions = pd.Index(previous['ticker']).get_indexer(current['ticker'])
+    aligned = np.zeros_like(now)
+    known = positions >= 0
+    aligned[known] = before[positions[known]]
+
+    rows, rule_ids = np.nonzero(now & ~aligned)
+    tickers = current['ticker'].to_numpy()
+    rules = compiled.rules
+    values = {
+        column: current[column].to_numpy(dtype=object)
+        for column, _ in compiled.groups if column in current.columns
+    }
+
+    return pd.DataFrame({
+        'ticker': tickers[rows],
+        'rule': [compiled.names[i] for i in rule_ids],
+        'column': [rules[i]['column'] for i in rule_ids],
+        'op': [rules[i]['op'] for i in rule_ids],
+        'threshold': [rules[i]['value'] for i in rule_ids],
+        'value': [values[rules[i]['column']][row] for row, i in zip(rows, rule_ids)],
+    }, columns=columns)
+
+
+def write_outbox(alerts: pd.DataFrame, snapshot_time: str = None,
+                 path: str = OUTBOX_PATH) -> int:
+    """Append alerts to the outbox as JSON lines; returns the number written"""
+    if alerts.empty:
+        return 0
+
+    fired_at = datetime.now().isoformat(timespec='seconds')
+    with open(path, 'a', encoding='utf-8') as f:
+        for alert in alerts.to_dict('records'):
+            alert = {key: (value.item() if hasattr(value, 'item') else value)
+                     for key, value in alert.items()}
+            alert.update({'fired_at': fired_at, 'snapshot': snapshot_time})
+            f.write(json.dumps(alert, ensure_ascii=False, default=str) + "\n")
+
+    return len(alerts)
+
+
+def load_rule_columns(compiled: CompiledRules, path: str) -> pd.DataFrame:
+    """Load only the snapshot columns the rules read (missing ones are skipped by evaluate)"""
+    available = set(read_table(path).column_names)
+    return load_snapshot(path, [column for column in compiled.columns if column in available])
+
+
+def run_alerts(rules_path: str = RULES_PATH, directory: str = SNAPSHOT_DIR,
+               outbox_path: str = OUTBOX_PATH, current: pd.DataFrame = None,
+               snapshot_path: str = None) -> pd.DataFrame:
+    """
+    Evaluate the rules on a snapshot against the one before it and write new alerts
+    snapshot_path: the snapshot to check (e.g. the path save_snapshot returned);
+    defaults to the latest in directory. The previous snapshot is the one before
+    it in the same directory, so a concurrent save cannot shift the pair
+    current: the scored frame of that snapshot if already in memory, so it is
+    not read back from disk
+    Returns the fired alerts (empty if there are no rules or no previous snapshot)
+    """
+    if not os.path.exists(rules_path):
+        return pd.DataFrame()
+
+    if snapshot_path is not None:
+        directory = os.path.dirname(snapshot_path)
+    names = [os.path.basename(path) for path in list_snapshots(directory)]
+    if snapshot_path is None and names:
+        snapshot_path = os.path.join(directory, names[-1])
+
+    # No previous snapshot, or this one was already removed by retention
+    name = os.path.basename(snapshot_path) if snapshot_path else None
+    if name not in names or names.index(name) == 0:
+        return pd.DataFrame()
+    previous_path = os.path.join(directory, names[names.index(name) - 1])
+
+    compiled = CompiledRules(load_rules(rules_path))
+    if current is None:
+        current = load_rule_columns(compiled, snapshot_path)
+    previous = load_rule_columns(compiled, previous_path)
+    alerts = fire_alerts(compiled, current, previous)
+    written = write_outbox(alerts, read_metadata(snapshot_path).get('run_time'), outbox_path)
+    print(f"Alerts: {written} fired from {len(compiled.rules)} rules")
+
+    return alerts
+
+
+if __name__ == "__main__":
+    # Evaluate alert_rules.json on the latest snapshot against the one before it
+    alerts = run_alerts()
+    if alerts.empty:
+        print("No new alerts")
+    else:
+        print(alerts.to_string(index=False))
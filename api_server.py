@@ -0,0 +1,313 @@
+"""
+ASX Stock Screener - HTTP JSON API
+Read-only service exposing the latest stored snapshot. Never triggers a data
+collection run; it only serves what snapshot_store has persisted.
+
+Endpoints:
+    GET /api/rankings   ranked stocks, with filters mirroring the app sidebar
+                        (sector, pe_max, range_max, short_trends) and paging
+                        (page, page_size)
+    GET /api/snapshot   metadata of the snapshot being served
+    GET /health         liveness check
+
+Responses carry an ETag; send it back in If-None-Match to get a 304.
+
+Usage:
+    python api_server.py --host 127.0.0.1 --port 8502
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from data_collector import SHORT_TRENDS
+from scoring_engine import prepare_display_dataframe, filter_scored
+from snapshot_store import SNAPSHOT_DIR, list_snapshots, load_snapshot, read_metadata
+
+# JSON field names for the display columns
+API_FIELDS = {
+    'Rank': 'rank',
+    'Ticker': 'ticker',
+    'Company': 'company',
+    'Sector': 'sector',
+    'Price ($)': 'price',
+    'Market Cap': 'market_cap',
+    'P/E': 'pe_ratio',
+    '52w High': 'week52_high',
+    '52w Low': 'week52_low',
+    '52w Position %': 'range_position_pct',
+    'Short Interest (6 weeks)': 'short_interest',
+    'Short Change': 'short_change',
+    'Short Trend': 'short_trend',
+    'Score': 'score',
+}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+CACHE_SIZE = 512           # Max cached query responses per snapshot
+RELOAD_INTERVAL = 5.0      # Seconds between checks for a newer snapshot
+
+# Queries rendered ahead of time whenever a snapshot is loaded: everything,
+# the app's default sidebar filters, and each sector on its own
+APP_DEFAULT_QUERY = {
+    'pe_max': ['30'],
+    'range_max': ['50'],
+    'short_trends': ['↓ Declining,→ Stable'],
+}
+
+
+class QueryError(ValueError):
+    """Raised for invalid query parameters (returned as HTTP 400)"""
+
+
+def parse_filters(params: Dict) -> Tuple[Dict, int, int]:
+    """
+    Turn query parameters into an apply_filters dict plus page and page_size
+    Unspecified filters default to "no filter"
+    """
+    def single(name, default=None):
+        values = params.get(name)
+        return values[-1] if values else default
+
+    def number(name, default, cast=float):
+        raw = single(name)
+        if raw is None or raw == '':
+            return default
+        try:
+            value = cast(raw)
+        except ValueError:
+            raise QueryError(f"{name} must be a number, got {raw!r}")
+        if isinstance(value, float) and math.isnan(value):
+            raise QueryError(f"{name} must be a number, got {raw!r}")
+        return value
+
+    short_trends = []
+    for raw in params.get('short_trends', []):
+        short_trends.extend(t.strip() for t in raw.split(',') if t.strip())
+    unknown = [t for t in short_trends if t not in SHORT_TRENDS]
+    if unknown:
+        raise QueryError(f"Unknown short_trends {unknown}; expected any of {SHORT_TRENDS}")
+
+    filters = {
+        'sector': single('sector', 'All') or 'All',
+        'pe_max': number('pe_max', math.inf),
+        'range_max': number('range_max', math.inf),
+        'short_trends': sorted(set(short_trends)),
+    }
+
+    page = number('page', 1, int)
+    page_size = number('page_size', DEFAULT_PAGE_SIZE, int)
+    if page < 1:
+        raise QueryError("page must be >= 1")
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise QueryError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+
+    return filters, page, page_size
+
+
+def cache_key(filters: Dict, page: int, page_size: int) -> str:
+    """Normalized key, so equivalent queries share one cached response"""
+    return json.dumps([filters, page, page_size], sort_keys=True, default=str)
+
+
+class SnapshotService:
+    """
+    Holds the latest snapshot and renders/caches JSON responses
+    The scored frame stays memory-mapped (numeric columns are shared with other
+    processes); only the requested page is formatted for display.
+    Picks up newer snapshots written by the app without restarting
+    """
+
+    def __init__(self, directory: str = SNAPSHOT_DIR):
+        self.directory = directory
+        self.path = None
+        self.metadata = {}
+        self.scored_df = None
+        self.cache = OrderedDict()
+        self.last_check = 0.0
+        self.lock = threading.Lock()
+
+    def refresh(self, force: bool = False):
+        """Load the newest snapshot if it changed (checked at most every RELOAD_INTERVAL)"""
+        now = time.monotonic()
+        if not force and now - self.last_check < RELOAD_INTERVAL:
+            return
+
+        with self.lock:
+            self.last_check = now
+            paths = list_snapshots(self.directory)
+            if not paths or paths[-1] == self.path:
+                return
+
+            scored_df = load_snapshot(paths[-1])
+            self.metadata = read_metadata(paths[-1])
+            self.scored_df = scored_df
+            self.path = paths[-1]
+            self.cache = OrderedDict()
+            print(f"Serving snapshot {self.path} ({len(scored_df)} stocks)")
+
+        self.precompute()
+
+    def precompute(self):
+        """Render the common queries so the first request for them is a cache hit"""
+        if self.scored_df is None:
+            return
+
+        queries = [{}, APP_DEFAULT_QUERY]
+        queries += [{'sector': [sector]} for sector in self.scored_df['sector'].dropna().unique()]
+
+        for params in queries:
+            self.rankings(params)
+
+    def _etag(self, body: bytes) -> str:
+        return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+    def _store(self, key: str, body: bytes, path: str) -> Tuple[str, bytes]:
+        entry = (self._etag(body), body)
+        with self.lock:
+            if path != self.path:
+                # A newer snapshot was loaded while rendering; don't cache stale data
+                return entry
+            self.cache[key] = entry
+            self.cache.move_to_end(key)
+            while len(self.cache) > CACHE_SIZE:
+                self.cache.popitem(last=False)
+        return entry
+
+    def rankings(self, params: Dict) -> Optional[Tuple[str, bytes]]:
+        """Return (etag, body) for a rankings query, or None if no snapshot exists"""
+        filters, page, page_size = parse_filters(params)
+        key = cache_key(filters, page, page_size)
+
+        with self.lock:
+            # Capture the frame, path and metadata together so a concurrent
+            # reload can't mix two snapshots in one response
+            df = self.scored_df
+            path = self.path
+            metadata = self.metadata
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache.move_to_end(key)
+                return cached
+
+        if df is None:
+            return None
+
+        filtered = filter_scored(df, filters)
+        start = (page - 1) * page_size
+        page_df = prepare_display_dataframe(filtered.iloc[start:start + page_size])
+        page_df = page_df.rename(columns=API_FIELDS)
+
+        body = json.dumps({
+            'snapshot': metadata.get('run_time'),
+            'total': len(filtered),
+            'page': page,
+            'page_size': page_size,
+            'pages': math.ceil(len(filtered) / page_size),
+            'results': json.loads(page_df.to_json(orient='records', force_ascii=False)),
+        }, ensure_ascii=False).encode('utf-8')
+
+        return self._store(key, body, path)
+
+    def snapshot_info(self) -> Optional[Tuple[str, bytes]]:
+        """Return (etag, body) describing the snapshot being served"""
+        with self.lock:
+            path = self.path
+            metadata = self.metadata
+        if path is None:
+            return None
+
+        info = {key: value for key, value in metadata.items() if key != 'universe'}
+        body = json.dumps(info).encode('utf-8')
+        return self._etag(body), body
+
+
+class APIRequestHandler(BaseHTTPRequestHandler):
+    """Routes GET requests to the SnapshotService attached to the server"""
+
+    server_version = 'ASXScreenerAPI/1.0'
+
+    def do_GET(self):
+        service = self.server.service
+        url = urlparse(self.path)
+
+        if url.path == '/health':
+            self._send(200, b'{"status": "ok"}')
+            return
+
+        service.refresh()
+
+        try:
+            if url.path == '/api/rankings':
+                result = service.rankings(parse_qs(url.query))
+            elif url.path == '/api/snapshot':
+                result = service.snapshot_info()
+            else:
+                self._send_error(404, f"Unknown endpoint {url.path}")
+                return
+        except QueryError as e:
+            self._send_error(400, str(e))
+            return
+
+        if result is None:
+            self._send_error(503, "No snapshot available yet - run an analysis in the app first")
+            return
+
+        etag, body = result
+        if etag in self.headers.get('If-None-Match', ''):
+            self._send(304, None, etag)
+        else:
+            self._send(200, body, etag)
+
+    def _send_error(self, status: int, message: str):
+        self._send(status, json.dumps({'error': message}).encode('utf-8'))
+
+    def _send(self, status: int, body: Optional[bytes], etag: str = None):
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+            # Clients may cache but must revalidate, since snapshots change
+            self.send_header('Cache-Control', 'no-cache')
+        if body is not None:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body is not None:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Per-request logging to stderr is too slow at hundreds of requests/sec
+        pass
+
+
+def create_server(host: str = '127.0.0.1', port: int = 8502,
+                  directory: str = SNAPSHOT_DIR) -> ThreadingHTTPServer:
+    """Build the HTTP server with the latest snapshot already loaded"""
+    server = ThreadingHTTPServer((host, port), APIRequestHandler)
+    server.daemon_threads = True
+    server.service = SnapshotService(directory)
+    server.service.refresh(force=True)
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve ASX screener rankings as JSON")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--snapshot-dir', default=SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.snapshot_dir)
+    print(f"ASX screener API listening on http://{args.host}:{args.port}/api/rankings")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+        server.server_close()
@@ -6,14 +6,21 @@ A tool to identify ASX300 stock buying opportunities based on:
 - P/E ratio valuation
 """
 
+import os
+
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-import sys
 
 # Import our custom modules
-from data_collector import collect_all_data, ASX300_TICKERS
-from scoring_engine import calculate_composite_score, prepare_display_dataframe
+from data_collector import (
+    collect_all_data, memory_footprint_mb, ASX300_TICKERS, SHORT_TRENDS, USING_FALLBACK_TICKERS
+)
+from scoring_engine import calculate_composite_score, prepare_display_dataframe, filter_scored
+from snapshot_store import save_snapshot, list_snapshots, load_snapshot, read_metadata, diff_snapshots
+from profiling import profile_run, profile_stage
+from alerts import run_alerts
+from exports import EXPORT_FORMATS, add_short_history_block, build_export, get_cached_export
 
 # Page configuration
 st.set_page_config(
@@ -113,12 +120,12 @@ def display_metrics(df: pd.DataFrame):
         st.metric("Stocks < 30% of 52w Range", low_in_range)
 
 
-def display_filters(df: pd.DataFrame):
+def display_filters(df_scored: pd.DataFrame):
     """Display filter options in sidebar"""
     st.sidebar.header("🔍 Filters")
     
     # Sector filter
-    all_sectors = ['All'] + sorted(df['Sector'].unique().tolist())
+    all_sectors = ['All'] + sorted(df_scored['sector'].dropna().unique().tolist())
     selected_sector = st.sidebar.selectbox("Sector", all_sectors)
     
     # P/E ratio filter
@@ -144,7 +151,7 @@ def display_filters(df: pd.DataFrame):
     # Short trend filter
     short_trend_options = st.sidebar.multiselect(
         "Short Interest Trend",
-        options=['↓ Declining', '→ Stable', '↑ Increasing', 'No Data', 'Insufficient Data'],
+        options=SHORT_TRENDS,
         default=['↓ Declining', '→ Stable'],
         help="Select which short interest trends to include"
     )
@@ -157,31 +164,158 @@ def display_filters(df: pd.DataFrame):
     }
 
 
-def apply_filters(df: pd.DataFrame, filters: dict) -> pd.DataFrame:
-    """Apply filters to the dataframe"""
-    filtered = df.copy()
+@st.cache_resource(max_entries=2)
+def load_cached_snapshot(path: str) -> pd.DataFrame:
+    """
+    Load a stored snapshot once per process, shared by all sessions
+    Numeric columns stay memory-mapped (shared with other processes); each
+    rerun formats only the filtered rows for display
+    """
+    return load_snapshot(path)
+
+
+@st.cache_data
+def cached_snapshot_diff(previous_path: str, current_path: str, n: int = 20):
+    """Top-N diff of two stored snapshots, computed once per pair of paths"""
+    return diff_snapshots(previous_path, current_path, n)
+
+
+def load_latest_into_session():
+    """Populate session state from the most recent stored snapshot, if any"""
+    paths = list_snapshots()
+    if not paths:
+        return
     
-    # Sector filter
-    if filters['sector'] != 'All':
-        filtered = filtered[filtered['Sector'] == filters['sector']]
+    try:
+        meta = read_metadata(paths[-1])
+        df_scored = load_cached_snapshot(paths[-1])
+        last_updated = datetime.fromisoformat(meta['run_time'])
+    except Exception as e:
+        st.sidebar.warning(f"Could not load stored snapshot: {str(e)}")
+        return
     
-    # P/E filter
-    filtered = filtered[
-        (filtered['P/E'].isna()) | (filtered['P/E'] <= filters['pe_max'])
-    ]
+    st.session_state['snapshot_id'] = paths[-1]
+    st.session_state['last_updated'] = last_updated
+    st.session_state['memory_mb'] = memory_footprint_mb(df_scored)
+
+
+def display_snapshot_changes():
+    """Show what moved into / out of the top 20 since the previous stored run"""
+    paths = list_snapshots()
+    if len(paths) < 2:
+        return
+    changes = cached_snapshot_diff(paths[-2], paths[-1], n=20)
     
-    # 52-week position filter
-    filtered = filtered[filtered['52w Position %'] <= filters['range_max']]
+    with st.expander("🔁 Changes in Top 20 Since Previous Run", expanded=False):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("**Entered Top 20**")
+            st.write(", ".join(changes['entered']) or "None")
+        with col2:
+            st.markdown("**Left Top 20**")
+            st.write(", ".join(changes['left']) or "None")
+
+
+def display_downloads(df_filtered: pd.DataFrame, filters: dict):
+    """
+    Offer exports of the filtered results
+    An export is only built when requested, then cached per (snapshot, filters, format)
+    """
+    fmt = st.selectbox(
+        "Export format",
+        options=list(EXPORT_FORMATS),
+        format_func=lambda f: EXPORT_FORMATS[f]['label']
+    )
+    spec = EXPORT_FORMATS[fmt]
+    snapshot_id = st.session_state.get('snapshot_id')
     
-    # Short trend filter
-    if filters['short_trends']:
-        filtered = filtered[filtered['Short Trend'].isin(filters['short_trends'])]
+    data = get_cached_export(snapshot_id, filters, fmt) if snapshot_id else None
+    
+    if data is None and st.button("📦 Prepare Download"):
+        with st.spinner(f"Building {spec['label']} export..."):
+            try:
+                # Read only the short histories from the stored snapshot
+                df_scored = load_snapshot(snapshot_id, ['ticker', 'short_history'])
+                export_df = add_short_history_block(df_filtered, df_scored)
+                data = build_export(export_df, fmt, snapshot_id, filters)
+            except ImportError as e:
+                st.error(str(e))
+    
+    if data is not None:
+        st.download_button(
+            label=f"📥 Download Results as {spec['label']}",
+            data=data,
+            file_name=f"asx_screener_{datetime.now().strftime('%Y%m%d')}.{spec['extension']}",
+            mime=spec['mime']
+        )
+
+
+def display_results():
+    """Display filters, metrics, downloads and the ranked table for the loaded snapshot"""
+    df_scored = load_cached_snapshot(st.session_state['snapshot_id'])
+    last_updated = st.session_state['last_updated']
+    
+    st.sidebar.markdown("---")
+    st.sidebar.info(f"**Last Updated:**\n{last_updated.strftime('%Y-%m-%d %H:%M:%S')}")
+    if 'memory_mb' in st.session_state:
+        st.sidebar.caption(f"Snapshot memory: {st.session_state['memory_mb']:.2f} MB")
+    
+    # Display filters
+    filters = display_filters(df_scored)
+    
+    # Apply filters, then format only the matching rows
+    df_filtered = prepare_display_dataframe(filter_scored(df_scored, filters))
+    
+    st.markdown("---")
+    
+    # Display metrics
+    display_metrics(df_filtered)
+    display_snapshot_changes()
+    
+    st.markdown("---")
+    
+    # Display results
+    st.subheader(f"📊 Results ({len(df_filtered)} stocks)")
+    
+    # Downloads (built only on request)
+    display_downloads(df_filtered, filters)
+    
+    # Display the dataframe
+    st.dataframe(
+        df_filtered,
+        use_container_width=True,
+        height=600,
+        hide_index=True
+    )
+    
+    # Top 10 stocks
+    st.markdown("---")
+    st.subheader("🏆 Top 10 Opportunities")
+    
+    top_10 = df_filtered.head(10)
+    
+    for idx, row in top_10.iterrows():
+        with st.expander(f"#{row['Rank']} - {row['Ticker']} - {row['Company']} (Score: {row['Score']})"):
+            col1, col2, col3 = st.columns(3)
     
-    # Re-rank after filtering
-    filtered = filtered.copy()
-    filtered['Rank'] = range(1, len(filtered) + 1)
+            with col1:
+                st.markdown("**📊 Price & Valuation**")
+                st.write(f"Current Price: ${row['Price ($)']:.2f}")
+                st.write(f"P/E Ratio: {row['P/E']:.1f}" if pd.notna(row['P/E']) else "P/E Ratio: N/A")
+                st.write(f"Market Cap: {row['Market Cap']}")
     
-    return filtered
+            with col2:
+                st.markdown("**📈 52-Week Range**")
+                st.write(f"52w High: ${row['52w High']:.2f}")
+                st.write(f"52w Low: ${row['52w Low']:.2f}")
+                st.write(f"Position: {row['52w Position %']:.1f}%")
+    
+            with col3:
+                st.markdown("**📉 Short Interest**")
+                st.write(f"Trend: {row['Short Trend']}")
+                if pd.notna(row['Short Change']):
+                    st.write(f"6-Week Change: {row['Short Change']:.2f}%")
+                st.write(f"Sector: {row['Sector']}")
 
 
 def main():
@@ -193,10 +327,15 @@ def main():
     
     # Sidebar
     st.sidebar.title("⚙️ Settings")
+    if USING_FALLBACK_TICKERS:
+        st.sidebar.warning(
+            f"asx300_tickers.py could not be imported - screening only "
+            f"{len(ASX300_TICKERS)} fallback tickers"
+        )
     
-    # Run analysis button
+    # Run analysis button (with ASX_PROFILE=1 each analysis run is profiled)
     if st.sidebar.button("🔄 Run Analysis", type="primary", use_container_width=True):
-        with st.spinner("🔄 Fetching data... This may take a few minutes..."):
+        with profile_run('run_analysis'), st.spinner("🔄 Fetching data... This may take a few minutes..."):
             try:
                 # Collect data
                 progress_bar = st.progress(0)
@@ -209,103 +348,58 @@ def main():
                 progress_bar.progress(40)
                 
                 # Collect all data
-                df_raw = collect_all_data(ASX300_TICKERS)
+                with profile_stage('collect'):
+                    df_raw = collect_all_data(ASX300_TICKERS)
                 
                 status_text.text("Calculating scores...")
                 progress_bar.progress(70)
                 
                 # Calculate scores
-                df_scored = calculate_composite_score(df_raw)
+                with profile_stage('scoring'):
+                    df_scored = calculate_composite_score(df_raw)
                 
                 status_text.text("Preparing results...")
                 progress_bar.progress(90)
                 
-                # Prepare for display
-                df_display = prepare_display_dataframe(df_scored)
+                # Persist the run as a versioned snapshot
+                with profile_stage('save snapshot'):
+                    snapshot_path = save_snapshot(df_scored, universe=ASX300_TICKERS)
                 
-                # Store in session state
-                st.session_state['data'] = df_display
+                # Store in session state; results are displayed from the saved snapshot
+                st.session_state['snapshot_id'] = snapshot_path
                 st.session_state['last_updated'] = datetime.now()
+                st.session_state['memory_mb'] = memory_footprint_mb(df_scored)
                 
                 progress_bar.progress(100)
                 status_text.text("✅ Analysis complete!")
                 
-                st.success(f"Successfully analyzed {len(df_display)} stocks!")
+                st.success(f"Successfully analyzed {len(df_scored)} stocks!")
                 
             except Exception as e:
                 st.error(f"Error during analysis: {str(e)}")
                 st.exception(e)
                 return
+            
+            # Fire alert rules on changes since the previous snapshot; a bad
+            # rule file should not throw away the completed run
+            try:
+                with profile_stage('alerts'):
+                    alerts = run_alerts(snapshot_path=snapshot_path, current=df_scored)
+                if not alerts.empty:
+                    st.info(f"🔔 {len(alerts)} new alerts written to the outbox")
+            except Exception as e:
+                st.warning(f"Alert rules could not be evaluated: {str(e)}")
+    
+    # Fall back to the most recent stored snapshot on a fresh session, or when
+    # this session's snapshot has since been removed by the retention policy
+    snapshot_id = st.session_state.get('snapshot_id')
+    if snapshot_id is None or not os.path.exists(snapshot_id):
+        st.session_state.pop('snapshot_id', None)
+        load_latest_into_session()
     
     # Display results if available
-    if 'data' in st.session_state:
-        df = st.session_state['data']
-        last_updated = st.session_state['last_updated']
-        
-        st.sidebar.markdown("---")
-        st.sidebar.info(f"**Last Updated:**\n{last_updated.strftime('%Y-%m-%d %H:%M:%S')}")
-        
-        # Display filters
-        filters = display_filters(df)
-        
-        # Apply filters
-        df_filtered = apply_filters(df, filters)
-        
-        st.markdown("---")
-        
-        # Display metrics
-        display_metrics(df_filtered)
-        
-        st.markdown("---")
-        
-        # Display results
-        st.subheader(f"📊 Results ({len(df_filtered)} stocks)")
-        
-        # Download button
-        csv = df_filtered.to_csv(index=False)
-        st.download_button(
-            label="📥 Download Results as CSV",
-            data=csv,
-            file_name=f"asx_screener_{datetime.now().strftime('%Y%m%d')}.csv",
-            mime="text/csv"
-        )
-        
-        # Display the dataframe
-        st.dataframe(
-            df_filtered,
-            use_container_width=True,
-            height=600,
-            hide_index=True
-        )
-        
-        # Top 10 stocks
-        st.markdown("---")
-        st.subheader("🏆 Top 10 Opportunities")
-        
-        top_10 = df_filtered.head(10)
-        
-        for idx, row in top_10.iterrows():
-            with st.expander(f"#{row['Rank']} - {row['Ticker']} - {row['Company']} (Score: {row['Score']})"):
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    st.markdown("**📊 Price & Valuation**")
-                    st.write(f"Current Price: ${row['Price ($)']:.2f}")
-                    st.write(f"P/E Ratio: {row['P/E']:.1f}" if pd.notna(row['P/E']) else "P/E Ratio: N/A")
-                    st.write(f"Market Cap: {row['Market Cap']}")
-                
-                with col2:
-                    st.markdown("**📈 52-Week Range**")
-                    st.write(f"52w High: ${row['52w High']:.2f}")
-                    st.write(f"52w Low: ${row['52w Low']:.2f}")
-                    st.write(f"Position: {row['52w Position %']:.1f}%")
-                
-                with col3:
-                    st.markdown("**📉 Short Interest**")
-                    st.write(f"Trend: {row['Short Trend']}")
-                    if pd.notna(row['Short Change']):
-                        st.write(f"6-Week Change: {row['Short Change']:.2f}%")
-                    st.write(f"Sector: {row['Sector']}")
+    if 'snapshot_id' in st.session_state:
+        display_results()
     
     else:
         # No data yet - show instructions
@@ -319,7 +413,7 @@ def main():
         - ✅ Current position in 52-week price range
         - ✅ P/E ratios and market caps
         - ✅ Sector information for diversification
-        - ✅ Downloadable results in CSV format
+        - ✅ Downloadable results as CSV, Parquet or Excel
         
         ### Data Freshness:
         - Stock prices: Real-time from Yahoo Finance
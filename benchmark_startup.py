@@ -0,0 +1,77 @@
+"""
+ASX Stock Screener - Startup Benchmark
+Measures cold-start import time of the app and CLI modules, each in a fresh
+Python process so nothing is already cached in sys.modules
+"""
+
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+# Module imports to time (app.py also runs the Streamlit page setup on import)
+TARGETS = {
+    'data_collector (CLI)': 'import data_collector',
+    'scoring_engine': 'import scoring_engine',
+    'app (Streamlit)': 'import app',
+}
+
+HEAVY_MODULES = ['yfinance', 'requests']
+
+
+def time_import(statement: str, runs: int = 5) -> Dict:
+    """
+    Time an import statement in fresh interpreters
+    Returns dict with best/mean seconds and the heavy modules that got loaded
+    """
+    probe = (
+        f"{statement}\n"
+        "import sys\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+
+    timings = []
+    loaded = ''
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-c', probe],
+            capture_output=True,
+            text=True
+        )
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip())
+        loaded = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ''
+
+    return {
+        'best_s': min(timings),
+        'mean_s': sum(timings) / len(timings),
+        'heavy_loaded': loaded or '-'
+    }
+
+
+def run_benchmark(runs: int = 5) -> List[Dict]:
+    """Benchmark every target and print a summary table"""
+    baseline = time_import('pass', runs)
+
+    print(f"{'Target':<24}{'Best (s)':>10}{'Mean (s)':>10}  Heavy modules loaded")
+    print(f"{'python (baseline)':<24}{baseline['best_s']:>10.3f}{baseline['mean_s']:>10.3f}  -")
+
+    results = []
+    for name, statement in TARGETS.items():
+        try:
+            timing = time_import(statement, runs)
+        except RuntimeError as e:
+            print(f"{name:<24}  failed: {str(e).splitlines()[-1]}")
+            continue
+        timing['target'] = name
+        results.append(timing)
+        print(f"{name:<24}{timing['best_s']:>10.3f}{timing['mean_s']:>10.3f}  {timing['heavy_loaded']}")
+
+    return results
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    run_benchmark(runs)
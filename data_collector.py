@@ -4,42 +4,76 @@ Fetches stock data from Yahoo Finance and ASIC short interest data
 """
 
 import pandas as pd
-import yfinance as yf
-import requests
+import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple
 import time
+import warnings
 
-# Import the extended ASX300 ticker list
-try:
-    from asx300_tickers import ASX300_TICKERS_EXTENDED
-    ASX300_TICKERS = ASX300_TICKERS_EXTENDED
-    print(f"Successfully loaded {len(ASX300_TICKERS)} tickers from asx300_tickers.py")
-except ImportError as e:
-    print(f"Warning: Could not import extended ticker list: {e}")
-    print("Using fallback list of 30 tickers")
-    # Fallback to a smaller list if the extended list file isn't available
-    ASX300_TICKERS = [
-        'BHP.AX', 'CBA.AX', 'CSL.AX', 'NAB.AX', 'WBC.AX', 'ANZ.AX', 'WES.AX', 'MQG.AX',
-        'FMG.AX', 'WDS.AX', 'RIO.AX', 'WOW.AX', 'GMG.AX', 'TCL.AX', 'TLS.AX', 'REA.AX',
-        'COL.AX', 'ALL.AX', 'STO.AX', 'QBE.AX', 'WTC.AX', 'S32.AX', 'RMD.AX', 'IAG.AX',
-        'AMP.AX', 'ORG.AX', 'AGL.AX', 'SUN.AX', 'JHX.AX', 'CPU.AX'
-    ]
-except Exception as e:
-    print(f"Unexpected error loading tickers: {e}")
-    # Fallback to a smaller list
-    ASX300_TICKERS = [
-        'BHP.AX', 'CBA.AX', 'CSL.AX', 'NAB.AX', 'WBC.AX', 'ANZ.AX', 'WES.AX', 'MQG.AX',
-        'FMG.AX', 'WDS.AX', 'RIO.AX', 'WOW.AX', 'GMG.AX', 'TCL.AX', 'TLS.AX', 'REA.AX',
-        'COL.AX', 'ALL.AX', 'STO.AX', 'QBE.AX', 'WTC.AX', 'S32.AX', 'RMD.AX', 'IAG.AX',
-        'AMP.AX', 'ORG.AX', 'AGL.AX', 'SUN.AX', 'JHX.AX', 'CPU.AX'
-    ]
+from profiling import profile_stage
+
+# yfinance and requests are imported inside the fetch functions so that
+# importing this module (e.g. to view a cached snapshot) stays cheap.
+
+# Fallback list used if the extended ticker list file isn't available
+FALLBACK_TICKERS = [
+    'BHP.AX', 'CBA.AX', 'CSL.AX', 'NAB.AX', 'WBC.AX', 'ANZ.AX', 'WES.AX', 'MQG.AX',
+    'FMG.AX', 'WDS.AX', 'RIO.AX', 'WOW.AX', 'GMG.AX', 'TCL.AX', 'TLS.AX', 'REA.AX',
+    'COL.AX', 'ALL.AX', 'STO.AX', 'QBE.AX', 'WTC.AX', 'S32.AX', 'RMD.AX', 'IAG.AX',
+    'AMP.AX', 'ORG.AX', 'AGL.AX', 'SUN.AX', 'JHX.AX', 'CPU.AX'
+]
+
+
+def load_tickers() -> List[str]:
+    """
+    Load the extended ASX300 ticker list, falling back to a smaller list
+    Does not print, so it is safe to call at import time; the fallback is
+    reported with a warning instead
+    """
+    try:
+        from asx300_tickers import ASX300_TICKERS_EXTENDED
+        return list(ASX300_TICKERS_EXTENDED)
+    except ImportError as e:
+        warnings.warn(
+            f"Could not import asx300_tickers ({e}); "
+            f"using the {len(FALLBACK_TICKERS)}-ticker fallback list",
+            stacklevel=2
+        )
+        return list(FALLBACK_TICKERS)
+
+
+ASX300_TICKERS = load_tickers()
+USING_FALLBACK_TICKERS = ASX300_TICKERS == FALLBACK_TICKERS
+
+# Short interest trend labels produced by summarize_short_interest
+SHORT_TRENDS = ['↓ Declining', '→ Stable', '↑ Increasing', 'No Data', 'Insufficient Data']
+
+# Compact dtypes for the collected frame. Low-cardinality strings become
+# categoricals; prices and percentages are rounded to 1-2 decimals so float32
+# holds them exactly enough. market_cap stays float64 (values exceed float32's
+# 7 significant digits). ticker and company_name stay plain strings: they are
+# unique per row, so a categorical would store one category per row plus the
+# codes and save nothing. Display code widens the float32 columns back to
+# rounded float64 (scoring_engine.DISPLAY_DECIMALS).
+COLLECTED_SCHEMA = {
+    'sector': 'category',
+    'current_price': 'float32',
+    'market_cap': 'float64',
+    'pe_ratio': 'float32',
+    'week52_high': 'float32',
+    'week52_low': 'float32',
+    'range_position_pct': 'float32',
+    'short_absolute_change': 'float32',
+    'short_trend': pd.CategoricalDtype(SHORT_TRENDS),
+}
 
 def get_asic_short_data(weeks: int = 6) -> pd.DataFrame:
     """
     Fetch ASIC short interest data for the last N weeks
     Returns DataFrame with ticker, date, short_positions, short_pct
     """
+    import requests
+
     print(f"Fetching ASIC short interest data for last {weeks} weeks...")
     
     all_data = []
@@ -103,11 +137,15 @@ def get_asic_short_data(weeks: int = 6) -> pd.DataFrame:
     return df
 
 
-def get_stock_data(ticker: str) -> Dict:
+def get_stock_data(ticker: str, history_sink: List = None) -> Dict:
     """
     Fetch stock data from Yahoo Finance for a single ticker
     Returns dict with all relevant metrics
+    If history_sink is a list, the downloaded daily prices are appended to it
+    (long format: date, ticker, high, low, close, volume) for factor calculations
     """
+    import yfinance as yf
+
     try:
         stock = yf.Ticker(ticker)
         info = stock.info
@@ -116,6 +154,16 @@ def get_stock_data(ticker: str) -> Dict:
         if hist.empty or len(hist) < 2:
             return None
         
+        if history_sink is not None:
+            history_sink.append(pd.DataFrame({
+                'date': hist.index.tz_localize(None) if hist.index.tz is not None else hist.index,
+                'ticker': ticker,
+                'high': hist['High'].values,
+                'low': hist['Low'].values,
+                'close': hist['Close'].values,
+                'volume': hist['Volume'].values if 'Volume' in hist.columns else np.nan,
+            }))
+        
         # Calculate current position in 52-week range
         current_price = hist['Close'].iloc[-1]
         week52_high = hist['High'].max()
@@ -152,112 +200,136 @@ def get_stock_data(ticker: str) -> Dict:
         return None
 
 
-def calculate_short_interest_metrics(short_df: pd.DataFrame, ticker_base: str) -> Dict:
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Calculate 6-week short interest trend for a ticker
-    ticker_base should be without .AX suffix (e.g., 'BHP' not 'BHP.AX')
+    Cast collected data to the compact dtypes in COLLECTED_SCHEMA (in place)
+    Columns that are missing from df are skipped
     """
-    # Filter for this ticker
-    ticker_data = short_df[short_df['ticker'] == ticker_base].copy()
-    
-    if ticker_data.empty:
-        return {
-            'short_history': [],
-            'absolute_change': None,
-            'trend': 'No Data'
-        }
+    for column, dtype in COLLECTED_SCHEMA.items():
+        if column in df.columns:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def memory_footprint_mb(df: pd.DataFrame) -> float:
+    """
+    Return the deep memory usage of a DataFrame in megabytes
+    Note: nested objects (e.g. short_history lists) are counted shallowly
+    """
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def summarize_short_interest(short_df: pd.DataFrame, weeks: int = 6) -> pd.DataFrame:
+    """
+    6-week short interest trend for every ticker at once (ticker without .AX)
+    short_df holds one observation per ticker per week, as the providers return it.
+    Returns DataFrame indexed by ticker base with short_history,
+    short_absolute_change and short_trend columns
+    """
+    columns = ['short_history', 'short_absolute_change', 'short_trend']
+    if short_df.empty or 'ticker' not in short_df.columns:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name='ticker'))
     
-    # Sort by date
-    ticker_data = ticker_data.sort_values('date')
+    # Last N observations per ticker, oldest first
+    recent = short_df.sort_values('date', kind='stable').groupby('ticker').tail(weeks)
+    grouped = recent.groupby('ticker', sort=False)['short_pct']
     
-    # Get last 6 weeks (or however many we have)
-    recent = ticker_data.tail(6)
+    counts = grouped.size()
+    change = grouped.last() - grouped.first()
+    change = change.where(counts >= 2)
     
-    short_history = []
-    for _, row in recent.iterrows():
-        short_history.append({
-            'date': row['date'],
-            'short_pct': row['short_pct']
-        })
+    trend = pd.Series(
+        np.select(
+            [counts < 2, change < -0.1, change > 0.1],
+            ['Insufficient Data', '↓ Declining', '↑ Increasing'],
+            default='→ Stable'
+        ),
+        index=counts.index
+    )
     
-    # Calculate absolute change (most recent - oldest in our dataset)
-    if len(short_history) >= 2:
-        absolute_change = short_history[-1]['short_pct'] - short_history[0]['short_pct']
-        
-        if absolute_change < -0.1:  # Declining by more than 0.1%
-            trend = '↓ Declining'
-        elif absolute_change > 0.1:  # Increasing by more than 0.1%
-            trend = '↑ Increasing'
-        else:
-            trend = '→ Stable'
-    else:
-        absolute_change = None
-        trend = 'Insufficient Data'
+    # One pass over plain arrays; iterating groupby groups is far slower here
+    histories = {}
+    for ticker, date, pct in zip(recent['ticker'].tolist(), recent['date'].tolist(),
+                                 recent['short_pct'].tolist()):
+        histories.setdefault(ticker, []).append({'date': date, 'short_pct': pct})
     
-    return {
-        'short_history': short_history,
-        'absolute_change': round(absolute_change, 2) if absolute_change is not None else None,
-        'trend': trend
-    }
+    return pd.DataFrame({
+        'short_history': pd.Series(histories),
+        'short_absolute_change': change.round(2),
+        'short_trend': trend,
+    }).rename_axis('ticker')
 
 
-def collect_all_data(tickers: List[str] = None) -> pd.DataFrame:
+def collect_all_data(tickers: List[str] = None, provider=None) -> pd.DataFrame:
     """
     Main function to collect all data for ASX300 stocks
+    provider: a data_providers.DataProvider (defaults to get_default_provider())
     Returns DataFrame with all metrics for ranking
     """
+    if provider is None:
+        from data_providers import get_default_provider
+        provider = get_default_provider()
+    
     if tickers is None:
         tickers = ASX300_TICKERS
+        if USING_FALLBACK_TICKERS:
+            print(f"! asx300_tickers unavailable, using the {len(tickers)}-ticker fallback list")
     
     print(f"\n{'='*60}")
     print(f"ASX Stock Screener - Data Collection")
     print(f"{'='*60}\n")
+    print(f"Universe: {len(tickers)} tickers, source: {provider.name}")
     
-    # Step 1: Get ASIC short interest data
-    short_df = get_asic_short_data(weeks=6)
+    # Step 1: Get short interest data
+    with profile_stage('fetch short interest'):
+        short_df = provider.get_short_interest(weeks=6)
     
-    # Step 2: Get stock data for each ticker
-    all_stocks = []
-    total = len(tickers)
+    # Step 2: Get price and fundamental metrics for all tickers
+    with profile_stage('fetch stocks'):
+        stocks = provider.get_stocks(tickers)
     
-    print(f"\nFetching stock data for {total} tickers...")
-    for i, ticker in enumerate(tickers, 1):
-        print(f"  [{i}/{total}] {ticker}...", end=' ')
-        
-        stock_data = get_stock_data(ticker)
-        
-        if stock_data:
-            # Get short interest metrics
-            ticker_base = ticker.replace('.AX', '')
-            short_metrics = calculate_short_interest_metrics(short_df, ticker_base)
-            
-            # Combine all data
-            stock_data.update({
-                'short_history': short_metrics['short_history'],
-                'short_absolute_change': short_metrics['absolute_change'],
-                'short_trend': short_metrics['trend']
-            })
-            
-            all_stocks.append(stock_data)
-            print("✓")
-        else:
-            print("✗ Failed")
-        
-        # Small delay to avoid rate limiting
-        time.sleep(0.3)
+    print(f"\nSuccessfully collected data for {len(stocks)} stocks")
+    
+    # Step 3: Join short interest metrics on the ticker without its .AX suffix
+    with profile_stage('short interest metrics'):
+        short_metrics = summarize_short_interest(short_df)
+        if len(stocks):
+            ticker_base = stocks['ticker'].str.replace('.AX', '', regex=False)
+            matched = short_metrics.reindex(ticker_base.values)
+            stocks['short_history'] = [
+                history if isinstance(history, list) else [] for history in matched['short_history']
+            ]
+            stocks['short_absolute_change'] = matched['short_absolute_change'].astype('float64').values
+            stocks['short_trend'] = matched['short_trend'].fillna('No Data').values
     
-    print(f"\nSuccessfully collected data for {len(all_stocks)} stocks")
+    # Step 4: Technical factors from the prices the provider already downloaded
+    if provider.price_panel is not None and len(stocks):
+        from technical_factors import compute_factors
+        with profile_stage('technical factors'):
+            factors = compute_factors(provider.price_panel)
+            stocks = stocks.join(factors, on='ticker')
+        print(f"Computed {factors.shape[1]} technical factors")
     
-    return pd.DataFrame(all_stocks)
+    df = apply_schema(stocks)
+    print(f"Snapshot memory footprint: {memory_footprint_mb(df):.2f} MB")
+    
+    return df
 
 
 if __name__ == "__main__":
-    # Test the data collection
+    # Test the data collection (pass --profile to save a CPU/memory profile)
+    import sys
+    from profiling import enable_profiling, profile_run
+    
+    if '--profile' in sys.argv:
+        enable_profiling(True)
+    
     print("Testing data collection module...\n")
     
     # Test with just a few tickers
     test_tickers = ['BHP.AX', 'CBA.AX', 'CSL.AX']
-    df = collect_all_data(test_tickers)
+    with profile_run('data_collector_test'):
+        df = collect_all_data(test_tickers)
     
     print("\n" + "="*60)
     print("Sample Results:")
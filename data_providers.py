@@ -0,0 +1,275 @@
+"""
+ASX Stock Screener - Data Providers
+Pluggable sources for prices, fundamentals and short interest.
+
+- NetworkProvider: Yahoo Finance + ASIC downloads (the original sources)
+- LocalFileProvider: bulk end-of-day CSV/Parquet dumps for the whole market,
+  each loaded in a single vectorized read
+
+Set ASX_DATA_DIR to a data drop directory to make the app and CLI use the
+local provider instead of the network.
+"""
+
+import os
+import time
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import List
+
+import pandas as pd
+
+from data_collector import get_asic_short_data, get_stock_data
+
+# Columns every provider returns from get_stocks (one row per ticker)
+STOCK_COLUMNS = [
+    'ticker', 'company_name', 'sector', 'current_price', 'market_cap', 'pe_ratio',
+    'week52_high', 'week52_low', 'range_position_pct'
+]
+
+# Columns every provider returns from get_short_interest (one row per ticker per date)
+SHORT_COLUMNS = ['date', 'ticker', 'company_name', 'short_positions', 'short_pct']
+
+
+# Columns of the long-format daily price panel (volume may be missing)
+PRICE_COLUMNS = ['date', 'ticker', 'high', 'low', 'close', 'volume']
+
+
+class DataProvider(ABC):
+    """
+    Base class for data sources
+    Subclasses implement get_stocks and get_short_interest. After get_stocks,
+    price_panel holds the daily prices it used (PRICE_COLUMNS), or None
+    """
+
+    name = 'base'
+    price_panel = None
+
+    @abstractmethod
+    def get_stocks(self, tickers: List[str]) -> pd.DataFrame:
+        """
+        Price and fundamental metrics for the tickers (e.g. 'BHP.AX')
+        Returns DataFrame with STOCK_COLUMNS; tickers without data are omitted
+        """
+
+    @abstractmethod
+    def get_short_interest(self, weeks: int = 6) -> pd.DataFrame:
+        """
+        Short interest for the last N weeks, one observation per ticker per week
+        Returns DataFrame with SHORT_COLUMNS; ticker has no .AX suffix, date is 'YYYY-MM-DD'
+        """
+
+
+class NetworkProvider(DataProvider):
+    """Yahoo Finance (one request per ticker) and ASIC daily short position reports"""
+
+    name = 'yahoo+asic'
+
+    def __init__(self, request_delay: float = 0.3):
+        self.request_delay = request_delay
+
+    def get_stocks(self, tickers: List[str]) -> pd.DataFrame:
+        all_stocks = []
+        histories = []
+        total = len(tickers)
+
+        print(f"\nFetching stock data for {total} tickers...")
+        for i, ticker in enumerate(tickers, 1):
+            print(f"  [{i}/{total}] {ticker}...", end=' ')
+
+            stock_data = get_stock_data(ticker, history_sink=histories)
+
+            if stock_data:
+                all_stocks.append(stock_data)
+                print("✓")
+            else:
+                print("✗ Failed")
+
+            # Small delay to avoid rate limiting
+            time.sleep(self.request_delay)
+
+        # Keep the year of prices already downloaded for the technical factors
+        self.price_panel = (
+            pd.concat(histories, ignore_index=True) if histories
+            else pd.DataFrame(columns=PRICE_COLUMNS)
+        )
+
+        return pd.DataFrame(all_stocks, columns=STOCK_COLUMNS)
+
+    def get_short_interest(self, weeks: int = 6) -> pd.DataFrame:
+        return get_asic_short_data(weeks=weeks)
+
+
+class LocalFileProvider(DataProvider):
+    """
+    Bulk end-of-day files for the whole market, in one directory:
+
+    - prices.parquet / prices.csv:           date, ticker, high, low, close (optional volume)
+    - fundamentals.parquet / fundamentals.csv: ticker, company_name, sector, market_cap, pe_ratio
+    - short_interest.parquet / short_interest.csv: date, ticker, short_pct
+      (optional company_name, short_positions; ticker without .AX). Daily
+      files are reduced to the last observation per ticker per week
+
+    Parquet is preferred when both formats exist.
+    """
+
+    name = 'local files'
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, stem: str) -> str:
+        for suffix in ('.parquet', '.csv'):
+            path = os.path.join(self.directory, stem + suffix)
+            if os.path.exists(path):
+                return path
+        raise FileNotFoundError(f"No {stem}.parquet or {stem}.csv in {self.directory}")
+
+    def _read(self, stem: str, columns: List[str], optional: List[str] = ()) -> pd.DataFrame:
+        """Read one dump file in a single call, loading only the needed columns"""
+        path = self._path(stem)
+        wanted = list(columns) + list(optional)
+
+        if path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            available = pq.read_schema(path).names
+            df = pd.read_parquet(path, columns=[c for c in wanted if c in available])
+        else:
+            df = pd.read_csv(path, usecols=lambda c: c in wanted)
+
+        missing = [c for c in columns if c not in df.columns]
+        if missing:
+            raise ValueError(f"{path} is missing columns {missing}")
+        return df
+
+    def get_price_panel(self, tickers: List[str] = None) -> pd.DataFrame:
+        """Last year of daily prices (long format), optionally limited to tickers"""
+        prices = self._read('prices', ['date', 'ticker', 'high', 'low', 'close'], ['volume'])
+        prices['date'] = pd.to_datetime(prices['date'])
+        if 'volume' not in prices.columns:
+            prices['volume'] = float('nan')
+
+        if tickers is not None:
+            prices = prices[prices['ticker'].isin(tickers)]
+
+        if not prices.empty:
+            prices = prices[prices['date'] > prices['date'].max() - timedelta(days=365)]
+
+        return prices[PRICE_COLUMNS]
+
+    def get_stocks(self, tickers: List[str]) -> pd.DataFrame:
+        prices = self.get_price_panel(tickers)
+        self.price_panel = prices
+        print(f"\nLoaded {len(prices)} price rows for {prices['ticker'].nunique()} tickers "
+              f"from {self.directory}")
+
+        # 52-week statistics for every ticker in one grouped pass
+        grouped = prices.sort_values('date', kind='stable').groupby('ticker')
+        stats = pd.DataFrame({
+            'current_price': grouped['close'].last(),
+            'week52_high': grouped['high'].max(),
+            'week52_low': grouped['low'].min(),
+            'days': grouped.size(),
+        })
+        # Same minimum history as get_stock_data
+        stats = stats[stats['days'] >= 2]
+
+        span = stats['week52_high'] - stats['week52_low']
+        position = ((stats['current_price'] - stats['week52_low']) / span * 100).where(span > 0, 50.0)
+
+        fundamentals = self._read(
+            'fundamentals', ['ticker'], ['company_name', 'sector', 'market_cap', 'pe_ratio']
+        ).drop_duplicates('ticker', keep='last').set_index('ticker')
+        fundamentals = fundamentals.reindex(stats.index)
+
+        def fundamental(column, default):
+            if column not in fundamentals.columns:
+                return pd.Series(default, index=stats.index)
+            if isinstance(default, float) and pd.isna(default):
+                return fundamentals[column]
+            return fundamentals[column].fillna(default)
+
+        pe_ratio = pd.to_numeric(fundamental('pe_ratio', float('nan')), errors='coerce')
+        # Fall back to the ticker when the company name is missing, as get_stock_data does
+        company_name = fundamental('company_name', stats.index.to_series())
+
+        stocks = pd.DataFrame({
+            'ticker': stats.index,
+            'company_name': company_name.values,
+            'sector': fundamental('sector', 'Unknown').values,
+            'current_price': stats['current_price'].round(2).values,
+            'market_cap': pd.to_numeric(fundamental('market_cap', 0), errors='coerce').fillna(0).values,
+            'pe_ratio': pe_ratio.where(pe_ratio > 0).round(2).values,
+            'week52_high': stats['week52_high'].round(2).values,
+            'week52_low': stats['week52_low'].round(2).values,
+            'range_position_pct': position.round(1).values,
+        })
+
+        # Keep the caller's ticker order
+        order = {ticker: i for i, ticker in enumerate(tickers)}
+        stocks = stocks.sort_values('ticker', key=lambda t: t.map(order)).reset_index(drop=True)
+
+        return stocks[STOCK_COLUMNS]
+
+    def get_short_interest(self, weeks: int = 6) -> pd.DataFrame:
+        shorts = self._read(
+            'short_interest', ['date', 'ticker', 'short_pct'], ['company_name', 'short_positions']
+        )
+        shorts['date'] = pd.to_datetime(shorts['date'])
+
+        if not shorts.empty:
+            latest = shorts['date'].max()
+            shorts = shorts[shorts['date'] > latest - timedelta(weeks=weeks)]
+            # Keep the last row per ticker per week, with weeks counted back from
+            # the latest date, to match the weekly ASIC sampling
+            week = (latest - shorts['date']).dt.days // 7
+            shorts = (shorts.assign(_week=week)
+                      .sort_values('date', kind='stable')
+                      .drop_duplicates(['ticker', '_week'], keep='last')
+                      .drop(columns='_week'))
+
+        shorts['date'] = shorts['date'].dt.strftime('%Y-%m-%d')
+        shorts['short_pct'] = pd.to_numeric(shorts['short_pct'], errors='coerce').fillna(0.0)
+        for column in ('company_name', 'short_positions'):
+            if column not in shorts.columns:
+                shorts[column] = None
+
+        print(f"Loaded {len(shorts)} short interest records from {self.directory}")
+        return shorts[SHORT_COLUMNS].reset_index(drop=True)
+
+
+def get_default_provider() -> DataProvider:
+    """LocalFileProvider if ASX_DATA_DIR is set, otherwise NetworkProvider"""
+    directory = os.environ.get('ASX_DATA_DIR')
+    if directory:
+        return LocalFileProvider(directory)
+    return NetworkProvider()
+
+
+if __name__ == "__main__":
+    # Run a full-universe screen from a local data drop:
+    #   python data_providers.py /path/to/data_drop [--profile]
+    import sys
+    from data_collector import collect_all_data
+    from profiling import enable_profiling, profile_run, profile_stage
+    from scoring_engine import calculate_composite_score, prepare_display_dataframe
+
+    args = [arg for arg in sys.argv[1:] if arg != '--profile']
+    if '--profile' in sys.argv:
+        enable_profiling(True)
+
+    if not args:
+        print("Usage: python data_providers.py DATA_DIR [--profile]")
+        sys.exit(1)
+
+    provider = LocalFileProvider(args[0])
+    prices = provider.get_price_panel()
+
+    start = time.perf_counter()
+    with profile_run('local_screen'):
+        df = collect_all_data(prices['ticker'].unique().tolist(), provider=provider)
+        with profile_stage('scoring'):
+            scored = calculate_composite_score(df)
+    elapsed = time.perf_counter() - start
+
+    print(f"\nScreened {len(scored)} stocks in {elapsed:.2f}s")
+    print(prepare_display_dataframe(scored).head(20).to_string(index=False))
@@ -0,0 +1,192 @@
+"""
+ASX Stock Screener - Result Exports
+Builds downloadable exports (CSV, compressed Parquet, Excel) only when asked,
+writing them in row chunks and caching the result per (snapshot, filters, format).
+
+Chunking bounds the intermediate conversion work (one chunk of CSV text, Arrow
+data or Excel rows at a time); the finished export is still held in memory, in
+the BytesIO it was written to, because st.download_button needs the whole file.
+"""
+
+import io
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional
+
+import pandas as pd
+
+# pyarrow and openpyxl are imported inside the writers that need them
+
+EXPORT_FORMATS = {
+    'csv': {'label': 'CSV', 'extension': 'csv', 'mime': 'text/csv'},
+    'parquet': {'label': 'Parquet (zstd)', 'extension': 'parquet',
+                'mime': 'application/vnd.apache.parquet'},
+    'xlsx': {'label': 'Excel', 'extension': 'xlsx',
+             'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'},
+}
+
+CHUNK_ROWS = 5000
+CACHE_SIZE = 16            # Number of finished exports kept in memory
+
+# Shared by all Streamlit sessions (threads) in the process
+_export_cache = OrderedDict()
+_export_lock = threading.Lock()
+
+
+def add_short_history_block(df_display: pd.DataFrame, df_scored: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Append one 'Short % YYYY-MM-DD' column per short interest date to the display frame
+    df_scored supplies the raw short_history lists; returns df_display unchanged if None
+    """
+    if df_scored is None or 'short_history' not in df_scored.columns:
+        return df_display
+
+    histories = df_scored.set_index('ticker')['short_history']
+    histories = histories[histories.index.isin(df_display['Ticker'])]
+
+    records = [
+        (ticker, entry['date'], entry['short_pct'])
+        for ticker, history in histories.items()
+        for entry in (history if history is not None else [])
+    ]
+    if not records:
+        return df_display
+
+    block = pd.DataFrame(records, columns=['Ticker', 'date', 'short_pct']).pivot_table(
+        index='Ticker', columns='date', values='short_pct', aggfunc='last'
+    )
+    block = block[sorted(block.columns)]
+    block.columns = [f"Short % {date}" for date in block.columns]
+
+    return df_display.join(block, on='Ticker')
+
+
+def iter_csv(df: pd.DataFrame, chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """Yield the CSV in chunks of chunk_rows rows (header in the first chunk)"""
+    if df.empty:
+        yield df.to_csv(index=False).encode('utf-8')
+        return
+
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        yield chunk.to_csv(index=False, header=(start == 0)).encode('utf-8')
+
+
+def write_parquet(df: pd.DataFrame, sink, chunk_rows: int = CHUNK_ROWS):
+    """
+    Write zstd-compressed Parquet to a path or file object, one row group per chunk
+    Only one chunk is converted to Arrow at a time
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Fix the schema from the whole frame so every chunk converts to the same
+    # types (e.g. an object column that is all None in one chunk)
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+
+    with pq.ParquetWriter(sink, schema, compression='zstd') as writer:
+        for start in range(0, len(df), chunk_rows):
+            chunk = df.iloc[start:start + chunk_rows]
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def write_excel(df: pd.DataFrame, sink, chunk_rows: int = CHUNK_ROWS):
+    """
+    Write an .xlsx to a path or file object using openpyxl's streaming write-only mode
+    Rows are appended chunk by chunk rather than building the full sheet in memory
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ImportError("Excel export requires openpyxl (pip install openpyxl)")
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Results')
+    sheet.append([str(column) for column in df.columns])
+
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        for row in chunk.itertuples(index=False, name=None):
+            sheet.append(list(row))
+
+    workbook.save(sink)
+
+
+def write_export(df: pd.DataFrame, fmt: str, sink):
+    """Stream an export in the given format to a path or binary file object"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {list(EXPORT_FORMATS)}")
+
+    if fmt == 'csv':
+        if isinstance(sink, str):
+            with open(sink, 'wb') as f:
+                for chunk in iter_csv(df):
+                    f.write(chunk)
+        else:
+            for chunk in iter_csv(df):
+                sink.write(chunk)
+    elif fmt == 'parquet':
+        write_parquet(df, sink)
+    else:
+        write_excel(df, sink)
+
+
+def export_key(snapshot_id: str, filters: Dict, fmt: str) -> str:
+    """Cache key for an export of one snapshot under one set of filters"""
+    return json.dumps([snapshot_id, filters, fmt], sort_keys=True, default=str)
+
+
+def get_cached_export(snapshot_id: str, filters: Dict, fmt: str) -> Optional[io.BytesIO]:
+    """Return a previously built export, or None"""
+    key = export_key(snapshot_id, filters, fmt)
+    with _export_lock:
+        data = _export_cache.get(key)
+        if data is not None:
+            _export_cache.move_to_end(key)
+    return data
+
+
+def build_export(df: pd.DataFrame, fmt: str, snapshot_id: str = None,
+                 filters: Dict = None) -> io.BytesIO:
+    """
+    Build an export in an in-memory buffer, reusing the cached one for the same
+    (snapshot, filters, format). Pass snapshot_id=None to skip caching
+    The buffer is returned as is (st.download_button accepts it), so the
+    file is not copied out into a separate bytes object
+    """
+    if snapshot_id is not None:
+        cached = get_cached_export(snapshot_id, filters, fmt)
+        if cached is not None:
+            return cached
+
+    buffer = io.BytesIO()
+    write_export(df, fmt, buffer)
+    buffer.seek(0)
+
+    if snapshot_id is not None:
+        with _export_lock:
+            _export_cache[export_key(snapshot_id, filters, fmt)] = buffer
+            while len(_export_cache) > CACHE_SIZE:
+                _export_cache.popitem(last=False)
+
+    return buffer
+
+
+if __name__ == "__main__":
+    # Export the latest stored snapshot:  python exports.py [csv|parquet|xlsx] [output path]
+    import sys
+    from scoring_engine import prepare_display_dataframe
+    from snapshot_store import load_latest_snapshot
+
+    fmt = sys.argv[1] if len(sys.argv) > 1 else 'csv'
+    df_scored = load_latest_snapshot()
+    if df_scored is None:
+        print("No stored snapshot found - run an analysis first")
+        sys.exit(1)
+
+    df = add_short_history_block(prepare_display_dataframe(df_scored), df_scored)
+    path = sys.argv[2] if len(sys.argv) > 2 else f"asx_screener.{EXPORT_FORMATS[fmt]['extension']}"
+    write_export(df, fmt, path)
+    print(f"Wrote {len(df)} rows to {path}")
@@ -0,0 +1,206 @@
+"""
+ASX Stock Screener - Profiling Hooks
+Opt-in CPU and memory profiling of collection/scoring runs.
+
+Enable with ASX_PROFILE=1 (app and CLIs) or --profile on the CLIs
+(data_collector.py, data_providers.py). Each
+profiled run writes a directory under profiles/ (ASX_PROFILE_DIR) with:
+
+- cpu.prof:    cProfile stats (open with pstats or snakeviz)
+- summary.txt: wall time per stage, top CPU hot spots by cumulative and
+               self time, peak traced memory and the largest allocation sites
+
+When profiling is disabled, profile_run and profile_stage return a shared
+no-op context manager, so the hooks cost nothing. Only one run is profiled at
+a time: a run that starts while another is being profiled (e.g. a second
+Streamlit session) runs unprofiled.
+"""
+
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+PROFILE_ENV = 'ASX_PROFILE'
+PROFILE_DIR = os.environ.get('ASX_PROFILE_DIR', 'profiles')
+TOP_N = 25
+TRACE_FRAMES = 10          # Stack depth recorded per allocation
+
+_NO_PROFILING = contextlib.nullcontext()
+_forced = None             # Set by enable_profiling(); overrides the environment
+# tracemalloc is process-wide and only one cProfile profiler can be active, so
+# one run is profiled at a time; runs that start meanwhile are not profiled
+_profile_lock = threading.Lock()
+# The profiled run on the thread that owns it, so stages from other threads'
+# (unprofiled) runs are not recorded into it
+_local = threading.local()
+
+
+def _active_run() -> Optional['ProfileRun']:
+    """The profiled run in progress on the calling thread, or None"""
+    return getattr(_local, 'run', None)
+
+
+def enable_profiling(enabled: bool = True):
+    """Turn profiling on/off for this process (e.g. from a --profile flag)"""
+    global _forced
+    _forced = enabled
+
+
+def profiling_enabled() -> bool:
+    """True if enabled via enable_profiling() or the ASX_PROFILE environment variable"""
+    if _forced is not None:
+        return _forced
+    return os.environ.get(PROFILE_ENV, '').lower() in ('1', 'true', 'yes', 'on')
+
+
+class ProfileRun:
+    """
+    One profiled run: CPU profile, allocation tracking and stage timings
+    Created by profile_run(), which takes _profile_lock; the run releases it on exit
+    """
+
+    def __init__(self, name: str, directory: str = None):
+        self.name = name
+        self.directory = directory or PROFILE_DIR
+        self.started = datetime.now()
+        self.stages: List[Tuple[str, float]] = []
+        self.profiler = cProfile.Profile()
+        self.report_dir: Optional[str] = None
+        self._owns_tracemalloc = False
+        self._start_time = 0.0
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        try:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACE_FRAMES)
+                self._owns_tracemalloc = True
+            tracemalloc.reset_peak()
+
+            _local.run = self
+            self._start_time = time.perf_counter()
+            self.profiler.enable()
+        except BaseException:
+            self._finish()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.disable()
+        self.elapsed = time.perf_counter() - self._start_time
+
+        try:
+            _, peak = tracemalloc.get_traced_memory()
+            memory_snapshot = tracemalloc.take_snapshot()
+        finally:
+            self._finish()
+
+        try:
+            self.report_dir = self.write_report(peak, memory_snapshot)
+            print(f"Profile for '{self.name}' saved to {self.report_dir}")
+        except OSError as e:
+            print(f"Could not save profile for '{self.name}': {e}")
+
+        return False
+
+    def _finish(self):
+        """Stop tracing (if this run started it) and let another run be profiled"""
+        _local.run = None
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+        _profile_lock.release()
+
+    def write_report(self, peak_bytes: int, memory_snapshot) -> str:
+        """Write cpu.prof and summary.txt, returning the report directory"""
+        report_dir = os.path.join(
+            self.directory, f"{self.started.strftime('%Y%m%d_%H%M%S_%f')}_{self.name}"
+        )
+        os.makedirs(report_dir, exist_ok=True)
+
+        self.profiler.dump_stats(os.path.join(report_dir, 'cpu.prof'))
+
+        lines = [
+            f"Run:        {self.name}",
+            f"Started:    {self.started.isoformat(timespec='seconds')}",
+            f"Wall time:  {self.elapsed:.3f}s",
+            f"Peak traced memory: {peak_bytes / 1e6:.1f} MB",
+            "",
+            "== Stages ==",
+        ]
+        for label, seconds in self.stages:
+            share = seconds / self.elapsed * 100 if self.elapsed else 0.0
+            lines.append(f"  {label:<32}{seconds:>9.3f}s {share:>6.1f}%")
+        if not self.stages:
+            lines.append("  (no stages recorded)")
+
+        for title, sort_key in (("Top CPU by cumulative time", 'cumulative'),
+                                ("Top CPU by self time", 'tottime')):
+            stream = io.StringIO()
+            stats = pstats.Stats(self.profiler, stream=stream)
+            stats.strip_dirs().sort_stats(sort_key).print_stats(TOP_N)
+            lines += ["", f"== {title} ==", stream.getvalue().strip()]
+
+        lines += ["", "== Largest allocation sites still live at end of run =="]
+        memory_snapshot = memory_snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+        for stat in memory_snapshot.statistics('lineno')[:TOP_N]:
+            frame = stat.traceback[0]
+            lines.append(f"  {stat.size / 1e6:>8.2f} MB {stat.count:>8} blocks  "
+                         f"{frame.filename}:{frame.lineno}")
+
+        with open(os.path.join(report_dir, 'summary.txt'), 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+
+        return report_dir
+
+
+class _Stage:
+    """Records wall time of one named stage into the active ProfileRun"""
+
+    def __init__(self, run: ProfileRun, label: str):
+        self.run = run
+        self.label = label
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.run.stages.append((self.label, time.perf_counter() - self.start))
+        return False
+
+
+def profile_run(name: str, directory: str = None):
+    """
+    Context manager that profiles the enclosed block when profiling is enabled
+    and no other run is being profiled (otherwise the block just runs)
+    Usage: with profile_run('refresh'): ...
+    """
+    if not profiling_enabled() or not _profile_lock.acquire(blocking=False):
+        return _NO_PROFILING
+    # The run releases the lock when it exits
+    try:
+        return ProfileRun(name, directory)
+    except BaseException:
+        _profile_lock.release()
+        raise
+
+
+def profile_stage(label: str):
+    """Context manager timing a named stage of this thread's profiled run (no-op otherwise)"""
+    run = _active_run()
+    if run is None:
+        return _NO_PROFILING
+    return _Stage(run, label)
+
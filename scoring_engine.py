@@ -9,24 +9,85 @@ Calculates composite scores based on:
 import pandas as pd
 import numpy as np
 
+# Composite score weights
+WEIGHT_RANGE = 0.50      # 50% weight - PRIMARY
+WEIGHT_SHORT = 0.30      # 30% weight - SECONDARY
+WEIGHT_PE = 0.20         # 20% weight - TERTIARY
 
-def normalize_score(value, min_val, max_val, reverse=False):
+SCORE_WEIGHTS = {
+    'range_score': WEIGHT_RANGE,
+    'short_score': WEIGHT_SHORT,
+    'pe_score': WEIGHT_PE,
+}
+
+# Technical factor columns computed by technical_factors.compute_factors,
+# mapped to their reverse flag (True = lower values score higher)
+FACTOR_DIRECTIONS = {
+    'momentum_1m': False,
+    'momentum_3m': False,
+    'momentum_6m': False,
+    'momentum_12m': False,
+    'volatility': True,
+    'max_drawdown': False,       # less negative drawdown scores higher
+    'dist_ma50': True,           # further below the average scores higher
+    'dist_ma200': True,
+    'avg_traded_value': False,   # more liquid scores higher
+}
+
+# Optional factor columns that calculate_composite_score can weight in:
+# the technical factors plus any added with register_factor
+OPTIONAL_FACTORS = dict(FACTOR_DIRECTIONS)
+
+# Decimal places used when displaying numeric columns
+DISPLAY_DECIMALS = {
+    'current_price': 2,
+    'pe_ratio': 2,
+    'week52_high': 2,
+    'week52_low': 2,
+    'range_position_pct': 1,
+    'short_absolute_change': 2,
+    'composite_score': 1,
+}
+
+
+def register_factor(column: str, reverse: bool = False):
+    """Register a column as an optional input for calculate_composite_score"""
+    OPTIONAL_FACTORS[column] = reverse
+
+
+def widen(values: pd.Series, column: str = None) -> pd.Series:
+    """
+    Widen a (possibly float32) column to float64, rounded to its DISPLAY_DECIMALS
+    so e.g. a stored 83.9 is 83.9 again rather than 83.90000152587891
+    """
+    values = values.astype('float64')
+    if column in DISPLAY_DECIMALS:
+        values = values.round(DISPLAY_DECIMALS[column])
+    return values
+
+
+def normalize_series(values: pd.Series, reverse=False) -> pd.Series:
     """
-    Normalize a value to 0-100 scale
+    Scale a Series to 0-100 using its own min/max
     If reverse=True, lower values get higher scores
+    Returns float64; missing values and a zero range get the neutral 50
     """
-    if pd.isna(value) or min_val == max_val:
-        return 50.0  # Neutral score if no data
+    values = values.astype('float64')
+    min_val = values.min()
+    max_val = values.max()
     
-    normalized = ((value - min_val) / (max_val - min_val)) * 100
+    if pd.isna(min_val) or min_val == max_val:
+        return pd.Series(50.0, index=values.index)
+    
+    normalized = ((values - min_val) / (max_val - min_val)) * 100
     
     if reverse:
         normalized = 100 - normalized
     
-    return normalized
+    return normalized.fillna(50.0)
 
 
-def calculate_composite_score(df: pd.DataFrame) -> pd.DataFrame:
+def calculate_composite_score(df: pd.DataFrame, factor_weights: dict = None) -> pd.DataFrame:
     """
     Calculate composite score for each stock
     
@@ -34,74 +95,89 @@ def calculate_composite_score(df: pd.DataFrame) -> pd.DataFrame:
     - 52-week range position: 50% (lower position = better score)
     - Short interest change: 30% (declining shorts = better score)
     - P/E ratio: 20% (lower P/E = better score)
+    
+    factor_weights optionally adds registered OPTIONAL_FACTORS, e.g.
+    {'momentum_3m': 0.1}. Each gets a '<factor>_score' column and the
+    composite is rescaled by the total weight so it stays on 0-100.
+    Scores are computed in float64 and stored as float32.
+    The weights used are recorded in df_scored.attrs['weights']
     """
+    factor_weights = factor_weights or {}
+    unknown = [name for name in factor_weights if name not in OPTIONAL_FACTORS]
+    if unknown:
+        raise ValueError(f"Unknown factors {unknown}; registered: {sorted(OPTIONAL_FACTORS)}")
     
     print("\nCalculating composite scores...")
     
-    df_scored = df.copy()
-    
     # Filter out stocks with missing critical data
-    df_scored = df_scored[df_scored['pe_ratio'].notna()].copy()
-    df_scored = df_scored[df_scored['range_position_pct'].notna()].copy()
+    # Boolean indexing already materialises a new frame, so a shallow copy is
+    # enough to detach it from df before adding the score columns
+    complete = df['pe_ratio'].notna() & df['range_position_pct'].notna()
+    df_scored = df.loc[complete].copy(deep=False)
     
     print(f"  Scoring {len(df_scored)} stocks with complete data")
     
+    # Scores are computed in float64 from the widened inputs, so results match
+    # the original float64 pipeline; they are cast to float32 when stored
+    scores = {}
+    
     # 1. Score for 52-week range position (lower is better)
     # Stocks near 52-week lows get high scores
-    min_range = df_scored['range_position_pct'].min()
-    max_range = df_scored['range_position_pct'].max()
-    
-    df_scored['range_score'] = df_scored['range_position_pct'].apply(
-        lambda x: normalize_score(x, min_range, max_range, reverse=True)
+    scores['range_score'] = normalize_series(
+        widen(df_scored['range_position_pct'], 'range_position_pct'), reverse=True
     )
     
     # 2. Score for short interest change (declining is better)
     # Stocks with declining shorts (negative change) get high scores
     # Handle missing short data
-    df_scored['short_score'] = 50.0  # Default neutral score
+    short_change = widen(df_scored['short_absolute_change'], 'short_absolute_change')
+    scores['short_score'] = pd.Series(50.0, index=df_scored.index)  # Default neutral score
     
-    has_short_data = df_scored['short_absolute_change'].notna()
+    has_short_data = short_change.notna()
     if has_short_data.sum() > 0:
-        short_data = df_scored.loc[has_short_data, 'short_absolute_change']
-        min_short = short_data.min()
-        max_short = short_data.max()
-        
         # Declining shorts (negative change) should get high scores
-        df_scored.loc[has_short_data, 'short_score'] = short_data.apply(
-            lambda x: normalize_score(x, min_short, max_short, reverse=True)
+        scores['short_score'][has_short_data] = normalize_series(
+            short_change[has_short_data], reverse=True
         )
     
     # 3. Score for P/E ratio (lower is better)
     # Filter out negative P/E ratios (usually means losses)
-    valid_pe = (df_scored['pe_ratio'] > 0) & (df_scored['pe_ratio'] < 100)
-    
-    if valid_pe.sum() > 0:
-        pe_data = df_scored.loc[valid_pe, 'pe_ratio']
-        min_pe = pe_data.min()
-        max_pe = pe_data.max()
-        
-        df_scored.loc[valid_pe, 'pe_score'] = pe_data.apply(
-            lambda x: normalize_score(x, min_pe, max_pe, reverse=True)
-        )
-    else:
-        df_scored['pe_score'] = 50.0
+    pe_ratio = widen(df_scored['pe_ratio'], 'pe_ratio')
+    valid_pe = (pe_ratio > 0) & (pe_ratio < 100)
     
     # For invalid P/E (negative or very high), give neutral score
-    df_scored.loc[~valid_pe, 'pe_score'] = 50.0
+    scores['pe_score'] = pd.Series(50.0, index=df_scored.index)
+    
+    if valid_pe.sum() > 0:
+        scores['pe_score'][valid_pe] = normalize_series(pe_ratio[valid_pe], reverse=True)
+    
+    # 4. Optional registered factors (missing values and columns score neutral)
+    for name in factor_weights:
+        if name in df_scored.columns:
+            scores[f'{name}_score'] = normalize_series(
+                df_scored[name], reverse=OPTIONAL_FACTORS[name]
+            )
+        else:
+            print(f"  ! Factor {name} not in data, scoring it neutral")
+            scores[f'{name}_score'] = pd.Series(50.0, index=df_scored.index)
     
     # Calculate weighted composite score
-    WEIGHT_RANGE = 0.50      # 50% weight - PRIMARY
-    WEIGHT_SHORT = 0.30      # 30% weight - SECONDARY
-    WEIGHT_PE = 0.20         # 20% weight - TERTIARY
-    
-    df_scored['composite_score'] = (
-        df_scored['range_score'] * WEIGHT_RANGE +
-        df_scored['short_score'] * WEIGHT_SHORT +
-        df_scored['pe_score'] * WEIGHT_PE
+    composite = (
+        scores['range_score'] * WEIGHT_RANGE +
+        scores['short_score'] * WEIGHT_SHORT +
+        scores['pe_score'] * WEIGHT_PE
     )
     
-    # Round for display
-    df_scored['composite_score'] = df_scored['composite_score'].round(1)
+    if factor_weights:
+        for name, weight in factor_weights.items():
+            composite += scores[f'{name}_score'] * weight
+        total_weight = WEIGHT_RANGE + WEIGHT_SHORT + WEIGHT_PE + sum(factor_weights.values())
+        composite /= total_weight
+    
+    # Store the scores compactly; round the composite for display first
+    for column, values in scores.items():
+        df_scored[column] = values.astype('float32')
+    df_scored['composite_score'] = composite.round(1).astype('float32')
     
     # Sort by composite score (highest first = best opportunities)
     df_scored = df_scored.sort_values('composite_score', ascending=False)
@@ -109,6 +185,12 @@ def calculate_composite_score(df: pd.DataFrame) -> pd.DataFrame:
     # Add rank
     df_scored['rank'] = range(1, len(df_scored) + 1)
     
+    # Record the weights used per score column (stored with the snapshot metadata)
+    df_scored.attrs['weights'] = {
+        **SCORE_WEIGHTS,
+        **{f'{name}_score': weight for name, weight in factor_weights.items()},
+    }
+    
     print(f"  ✓ Scoring complete. Top score: {df_scored['composite_score'].max():.1f}")
     
     return df_scored
@@ -137,6 +219,7 @@ def prepare_display_dataframe(df_scored: pd.DataFrame) -> pd.DataFrame:
     Prepare final dataframe for display in the UI
     """
     # Select and rename columns for display
+    # (column selection already copies; the shallow copy just detaches it)
     display_df = df_scored[[
         'rank',
         'ticker',
@@ -152,7 +235,12 @@ def prepare_display_dataframe(df_scored: pd.DataFrame) -> pd.DataFrame:
         'short_absolute_change',
         'short_trend',
         'composite_score'
-    ]].copy()
+    ]].copy(deep=False)
+    
+    # Widen float32 columns back to rounded float64 for display, so the table
+    # shows 83.9 rather than float32 artefacts like 83.900002
+    for column in DISPLAY_DECIMALS:
+        display_df[column] = widen(display_df[column], column)
     
     # Format market cap
     display_df['market_cap_formatted'] = display_df['market_cap'].apply(
@@ -192,6 +280,59 @@ def prepare_display_dataframe(df_scored: pd.DataFrame) -> pd.DataFrame:
     return display_df[final_columns]
 
 
+def apply_filters(df: pd.DataFrame, filters: dict) -> pd.DataFrame:
+    """
+    Apply filters to the display dataframe
+    filters: sector ('All' for any), pe_max, range_max, short_trends (empty = any)
+    """
+    # Combine all filters into one mask so only a single filtered frame is built
+    mask = pd.Series(True, index=df.index)
+    
+    # Sector filter
+    if filters['sector'] != 'All':
+        mask &= df['Sector'] == filters['sector']
+    
+    # P/E filter
+    mask &= (df['P/E'].isna()) | (df['P/E'] <= filters['pe_max'])
+    
+    # 52-week position filter
+    mask &= df['52w Position %'] <= filters['range_max']
+    
+    # Short trend filter
+    if filters['short_trends']:
+        mask &= df['Short Trend'].isin(filters['short_trends'])
+    
+    # Re-rank after filtering (boolean indexing already copies the rows)
+    filtered = df.loc[mask].copy(deep=False)
+    filtered['Rank'] = range(1, len(filtered) + 1)
+    
+    return filtered
+
+
+def filter_scored(df_scored: pd.DataFrame, filters: dict) -> pd.DataFrame:
+    """
+    apply_filters on the scored frame (raw column names), so only the matching
+    rows need to go through prepare_display_dataframe
+    Values are compared at display precision, matching apply_filters.
+    Returns the matching rows in rank order, re-ranked from 1
+    """
+    mask = pd.Series(True, index=df_scored.index)
+    
+    if filters['sector'] != 'All':
+        mask &= df_scored['sector'] == filters['sector']
+    
+    pe_ratio = widen(df_scored['pe_ratio'], 'pe_ratio')
+    mask &= pe_ratio.isna() | (pe_ratio <= filters['pe_max'])
+    
+    mask &= widen(df_scored['range_position_pct'], 'range_position_pct') <= filters['range_max']
+    
+    if filters['short_trends']:
+        mask &= df_scored['short_trend'].isin(filters['short_trends'])
+    
+    filtered = df_scored.loc[mask]
+    return filtered.assign(rank=range(1, len(filtered) + 1))
+
+
 if __name__ == "__main__":
     # Test scoring with sample data
     print("Testing scoring engine...")
@@ -0,0 +1,247 @@
+"""
+ASX Stock Screener - Snapshot Storage Module
+Persists every scored run as a versioned, columnar Arrow IPC snapshot with
+run metadata, applies a retention policy, and loads snapshots through a
+memory map: numeric columns come back as read-only views onto the mapped
+file (shared page cache), while strings, categoricals and the nested
+short_history column are converted into process memory
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# pyarrow is imported inside the functions so importing this module stays cheap
+
+SNAPSHOT_DIR = os.environ.get('ASX_SNAPSHOT_DIR', 'snapshots')
+SNAPSHOT_PREFIX = 'snapshot_'
+SNAPSHOT_SUFFIX = '.arrow'
+METADATA_KEY = b'asx_screener'
+# Microseconds keep runs finishing in the same second from sharing a file name
+SNAPSHOT_TIME_FORMAT = '%Y%m%d_%H%M%S_%f'
+
+# Retention policy: keep at most this many snapshots, and none older than this
+RETAIN_COUNT = 30
+RETAIN_DAYS = 90
+
+
+def _snapshot_path(run_time: datetime, directory: str) -> str:
+    """Build the file path for a snapshot taken at run_time"""
+    return os.path.join(
+        directory,
+        f"{SNAPSHOT_PREFIX}{run_time.strftime(SNAPSHOT_TIME_FORMAT)}{SNAPSHOT_SUFFIX}"
+    )
+
+
+def _data_timestamps(df: pd.DataFrame) -> Dict:
+    """Earliest and latest short interest dates contained in the snapshot"""
+    dates = [
+        entry['date']
+        for history in df.get('short_history', [])
+        for entry in (history if history is not None else [])
+    ]
+    return {
+        'short_data_from': min(dates) if dates else None,
+        'short_data_to': max(dates) if dates else None,
+    }
+
+
+def list_snapshots(directory: str = SNAPSHOT_DIR) -> List[str]:
+    """
+    List snapshot paths in the directory, oldest first
+    File names embed the run time, so lexical order is chronological
+    """
+    if not os.path.isdir(directory):
+        return []
+
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(SNAPSHOT_PREFIX) and name.endswith(SNAPSHOT_SUFFIX)
+    )
+    return [os.path.join(directory, name) for name in names]
+
+
+def save_snapshot(df_scored: pd.DataFrame, universe: List[str] = None,
+                  weights: Dict = None, run_time: datetime = None,
+                  directory: str = SNAPSHOT_DIR) -> str:
+    """
+    Persist a scored DataFrame as an uncompressed Arrow IPC file
+    (uncompressed so it can be memory-mapped) and apply the retention policy
+    weights defaults to the weights calculate_composite_score recorded in df_scored.attrs
+    Returns the path of the written snapshot
+    """
+    import pyarrow as pa
+
+    run_time = run_time or datetime.now()
+    os.makedirs(directory, exist_ok=True)
+
+    metadata = {
+        'run_time': run_time.isoformat(timespec='seconds'),
+        'universe': list(universe) if universe is not None else None,
+        'universe_size': len(universe) if universe is not None else None,
+        'weights': weights if weights is not None else df_scored.attrs.get('weights'),
+        'row_count': len(df_scored),
+    }
+    metadata.update(_data_timestamps(df_scored))
+
+    table = pa.Table.from_pandas(df_scored, preserve_index=False)
+    # Keep missing floats as NaN rather than Arrow nulls: a column with nulls
+    # has to be copied to fill in NaN on load, a null-free one can stay mapped
+    for i, field in enumerate(table.schema):
+        if pa.types.is_floating(field.type) and table.column(i).null_count:
+            values = df_scored[field.name].to_numpy(dtype=field.type.to_pandas_dtype())
+            table = table.set_column(i, field, pa.array(values, type=field.type))
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        METADATA_KEY: json.dumps(metadata).encode('utf-8'),
+    })
+
+    path = _snapshot_path(run_time, directory)
+    tmp_path = path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    # Atomic rename so readers never see a half-written snapshot
+    os.replace(tmp_path, path)
+
+    print(f"Saved snapshot {path} ({len(df_scored)} rows)")
+
+    apply_retention(directory)
+
+    return path
+
+
+def apply_retention(directory: str = SNAPSHOT_DIR, keep: int = RETAIN_COUNT,
+                    max_age_days: int = RETAIN_DAYS) -> List[str]:
+    """
+    Delete snapshots beyond the newest `keep`, and any older than max_age_days
+    The newest snapshot is always kept. Returns the deleted paths
+    """
+    paths = list_snapshots(directory)
+    if not paths:
+        return []
+
+    cutoff = datetime.now() - timedelta(days=max_age_days)
+    removed = []
+
+    for i, path in enumerate(paths[:-1]):
+        too_many = i < len(paths) - keep
+        try:
+            stamp = os.path.basename(path)[len(SNAPSHOT_PREFIX):-len(SNAPSHOT_SUFFIX)]
+            too_old = datetime.strptime(stamp[:15], '%Y%m%d_%H%M%S') < cutoff
+        except ValueError:
+            too_old = False
+
+        if too_many or too_old:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue  # Already removed by a concurrent run
+            removed.append(path)
+
+    return removed
+
+
+def read_table(path: str):
+    """
+    Open a snapshot as a memory-mapped pyarrow Table
+    Column buffers point into the mapped file (nothing is read until used), so
+    processes reading the same snapshot share its page-cache pages
+    """
+    import pyarrow as pa
+
+    source = pa.memory_map(path, 'r')
+    return pa.ipc.open_file(source).read_all()
+
+
+def read_metadata(path: str) -> Dict:
+    """Read only the run metadata of a snapshot (no column data is loaded)"""
+    import pyarrow as pa
+
+    with pa.memory_map(path, 'r') as source:
+        schema = pa.ipc.open_file(source).schema
+    raw = (schema.metadata or {}).get(METADATA_KEY)
+    return json.loads(raw) if raw else {}
+
+
+def load_snapshot(path: str, columns: List[str] = None) -> pd.DataFrame:
+    """
+    Load a snapshot into a DataFrame with the same shape as calculate_composite_score output
+    (optionally only some columns). Numeric columns are zero-copy, read-only
+    views onto the memory map; other columns are converted
+    """
+    table = read_table(path)
+    if columns is not None:
+        table = table.select(columns)
+    # split_blocks keeps one block per column, so pandas does not consolidate
+    # (copy) the mapped numeric buffers into 2-D blocks
+    df = table.to_pandas(split_blocks=True)
+
+    # Arrow returns nested lists as arrays; restore plain lists for display code
+    if 'short_history' in df.columns:
+        df['short_history'] = df['short_history'].map(
+            lambda history: list(history) if history is not None else []
+        )
+
+    return df
+
+
+def load_latest_snapshot(directory: str = SNAPSHOT_DIR) -> Optional[pd.DataFrame]:
+    """Load the most recent snapshot, or None if there are none"""
+    paths = list_snapshots(directory)
+    if not paths:
+        return None
+    return load_snapshot(paths[-1])
+
+
+def diff_top_n(previous: pd.DataFrame, current: pd.DataFrame, n: int = 20) -> Dict:
+    """
+    Compare the top N of two scored snapshots
+    Returns tickers that entered/left the top N and rank moves for those in both
+    """
+    prev_top = previous.nsmallest(n, 'rank').set_index('ticker')['rank']
+    curr_top = current.nsmallest(n, 'rank').set_index('ticker')['rank']
+
+    entered = curr_top.index.difference(prev_top.index)
+    left = prev_top.index.difference(curr_top.index)
+    stayed = curr_top.index.intersection(prev_top.index)
+
+    moves = (prev_top[stayed] - curr_top[stayed]).sort_values(ascending=False)
+
+    return {
+        'entered': curr_top[entered].sort_values().index.tolist(),
+        'left': prev_top[left].sort_values().index.tolist(),
+        'rank_change': {ticker: int(change) for ticker, change in moves.items()},
+    }
+
+
+def diff_snapshots(previous_path: str, current_path: str, n: int = 20) -> Dict:
+    """diff_top_n of two stored snapshots, reading only their ticker and rank columns"""
+    columns = ['ticker', 'rank']
+    return diff_top_n(load_snapshot(previous_path, columns), load_snapshot(current_path, columns), n)
+
+
+def diff_latest(directory: str = SNAPSHOT_DIR, n: int = 20) -> Optional[Dict]:
+    """Diff the two most recent snapshots, or None if fewer than two exist"""
+    paths = list_snapshots(directory)
+    if len(paths) < 2:
+        return None
+    return diff_snapshots(paths[-2], paths[-1], n)
+
+
+if __name__ == "__main__":
+    # Show stored snapshots and what changed in the top 20 since the previous run
+    paths = list_snapshots()
+    print(f"{len(paths)} snapshots in {SNAPSHOT_DIR}/")
+    for path in paths[-5:]:
+        meta = read_metadata(path)
+        print(f"  {os.path.basename(path)}: {meta.get('row_count')} stocks, "
+              f"run {meta.get('run_time')}")
+
+    changes = diff_latest()
+    if changes:
+        print(f"\nEntered top 20: {', '.join(changes['entered']) or '-'}")
+        print(f"Left top 20:    {', '.join(changes['left']) or '-'}")
@@ -0,0 +1,142 @@
+"""
+ASX Stock Screener - Technical Factors
+Computes price-based factors for every ticker at once from the daily price
+panel the data providers already downloaded (no extra fetching):
+
+- momentum_1m / 3m / 6m / 12m: % price change over 21/63/126/252 trading days
+- volatility: annualized % standard deviation of daily log returns
+- max_drawdown: worst % fall from a running peak (negative)
+- dist_ma50 / dist_ma200: % distance of the last close from its moving average
+- avg_traded_value: mean daily close x volume over the last 20 trading days
+
+The factor names and scoring directions live in scoring_engine.FACTOR_DIRECTIONS,
+so they can be given a weight in calculate_composite_score(df, factor_weights={...})
+without importing this module.
+"""
+
+import warnings
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from scoring_engine import FACTOR_DIRECTIONS
+
+TRADING_DAYS = 252
+
+MOMENTUM_WINDOWS = {
+    'momentum_1m': 21,
+    'momentum_3m': 63,
+    'momentum_6m': 126,
+    'momentum_12m': 252,
+}
+
+MA_WINDOWS = {
+    'dist_ma50': 50,
+    'dist_ma200': 200,
+}
+
+TRADED_VALUE_WINDOW = 20
+
+# Providers keep about one year of prices (250-253 trading days), so a lookback
+# may fall back to the oldest close if at least this fraction of it is available
+MIN_LOOKBACK_FRACTION = 0.95
+
+
+def pivot_panel(panel: pd.DataFrame, fields) -> pd.DataFrame:
+    """Long-format panel -> date x ticker matrix per field, sorted by date"""
+    deduped = panel.drop_duplicates(['date', 'ticker'], keep='last')
+    return deduped.pivot(index='date', columns='ticker', values=fields).sort_index()
+
+
+def _lagged(values: np.ndarray, lag: int) -> np.ndarray:
+    """Row `lag` rows before the last one, NaN when the history is too short"""
+    if len(values) > lag:
+        return values[-1 - lag]
+    if len(values) > 1 and len(values) - 1 >= lag * MIN_LOOKBACK_FRACTION:
+        return values[0]
+    return np.full(values.shape[1], np.nan)
+
+
+def compute_factors(panel: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute all technical factors from a long-format price panel
+    (date, ticker, close and optionally volume). Returns float32 DataFrame
+    indexed by ticker with one column per factor in FACTOR_DIRECTIONS
+    """
+    columns = list(FACTOR_DIRECTIONS)
+    if panel is None or panel.empty:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name='ticker'), dtype='float32')
+
+    has_volume = 'volume' in panel.columns and panel['volume'].notna().any()
+    wide = pivot_panel(panel, ['close', 'volume'] if has_volume else ['close'])
+    close_wide = wide['close']
+    tickers = close_wide.columns
+    raw_close = close_wide.to_numpy(dtype='float64')
+
+    # Forward-fill gaps (suspensions, missing days) so lookbacks use the last known close
+    close = close_wide.ffill().to_numpy(dtype='float64')
+    last = close[-1]
+
+    factors: Dict[str, np.ndarray] = {}
+
+    # Tickers with too little history just get NaN (neutral when scored)
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+
+        # Momentum
+        for name, window in MOMENTUM_WINDOWS.items():
+            factors[name] = (last / _lagged(close, window) - 1) * 100
+
+        # Realized volatility from daily log returns (gaps produce NaN and are skipped)
+        log_returns = np.diff(np.log(raw_close), axis=0)
+        factors['volatility'] = np.nanstd(log_returns, axis=0, ddof=1) * np.sqrt(TRADING_DAYS) * 100
+
+        # Maximum drawdown from the running peak
+        running_peak = np.fmax.accumulate(close, axis=0)
+        factors['max_drawdown'] = np.nanmin(close / running_peak - 1, axis=0) * 100
+
+        # Distance from moving averages (needs a full window)
+        for name, window in MA_WINDOWS.items():
+            if len(close) >= window:
+                moving_average = np.nanmean(close[-window:], axis=0)
+                factors[name] = (last / moving_average - 1) * 100
+            else:
+                factors[name] = np.full(len(tickers), np.nan)
+
+        # Average traded value
+        if has_volume:
+            volume = wide['volume'].to_numpy(dtype='float64')
+            traded = (raw_close * volume)[-TRADED_VALUE_WINDOW:]
+            factors['avg_traded_value'] = np.nanmean(traded, axis=0)
+        else:
+            factors['avg_traded_value'] = np.full(len(tickers), np.nan)
+
+    result = pd.DataFrame(factors, index=pd.Index(tickers, name='ticker'))
+    result = result.replace([np.inf, -np.inf], np.nan)
+
+    return result[columns].astype('float32')
+
+
+if __name__ == "__main__":
+    # Time the factor calculation on a synthetic full-market panel
+    import time
+
+    rng = np.random.default_rng(0)
+    n_tickers, n_days = 2000, TRADING_DAYS
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n_days)
+    close = np.exp(np.cumsum(rng.normal(0, 0.02, (n_days, n_tickers)), axis=0)) * 10
+
+    panel = pd.DataFrame({
+        'date': np.repeat(dates, n_tickers),
+        'ticker': np.tile([f"T{i:04d}.AX" for i in range(n_tickers)], n_days),
+        'close': close.ravel(),
+        'volume': rng.integers(1_000, 1_000_000, n_days * n_tickers),
+    })
+
+    start = time.perf_counter()
+    factors = compute_factors(panel)
+    elapsed = time.perf_counter() - start
+
+    print(f"Computed {factors.shape[1]} factors for {len(factors)} tickers in {elapsed*1000:.0f} ms")
+    print(factors.describe().T.round(2).to_string())
@@ -0,0 +1,137 @@
+"""
+ASX Stock Screener - Weight Scenarios
+Evaluates many score weightings at once: the normalized factor scores from
+calculate_composite_score form an (stocks x factors) matrix, and every
+weight vector is applied in a single matrix multiply. Returns per-scenario
+rankings, rank-stability statistics, and the stocks that stay in the top N
+across scenarios.
+"""
+
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from scoring_engine import SCORE_WEIGHTS
+
+
+def score_matrix(df_scored: pd.DataFrame, score_columns: List[str] = None) -> np.ndarray:
+    """
+    Stack the per-factor score columns (0-100) into a float32 (stocks x factors) matrix
+    Defaults to the base scores: range_score, short_score, pe_score
+    """
+    score_columns = score_columns or list(SCORE_WEIGHTS)
+    missing = [c for c in score_columns if c not in df_scored.columns]
+    if missing:
+        raise ValueError(f"Score columns {missing} not found - run calculate_composite_score first")
+    return df_scored[score_columns].to_numpy(dtype='float32')
+
+
+def random_weights(n_scenarios: int, base_weights: Dict[str, float] = None,
+                   concentration: float = 20.0, seed: int = 0) -> pd.DataFrame:
+    """
+    Draw weight vectors from a Dirichlet distribution centred on base_weights
+    Higher concentration keeps scenarios closer to the base weights.
+    Returns DataFrame (scenarios x factors) with rows summing to 1; row 0 is the base
+    """
+    base_weights = base_weights or SCORE_WEIGHTS
+    base = np.array(list(base_weights.values()), dtype='float64')
+    base = base / base.sum()
+
+    rng = np.random.default_rng(seed)
+    draws = rng.dirichlet(base * concentration, size=n_scenarios)
+    draws[0] = base
+
+    return pd.DataFrame(draws, columns=list(base_weights))
+
+
+def rank_scores(scores: np.ndarray) -> np.ndarray:
+    """Rank each column of a (stocks x scenarios) score matrix, 1 = highest score"""
+    order = np.argsort(-scores, axis=0, kind='stable')
+    ranks = np.empty(scores.shape, dtype=np.int32)
+    np.put_along_axis(
+        ranks, order, np.arange(1, scores.shape[0] + 1, dtype=np.int32)[:, None], axis=0
+    )
+    return ranks
+
+
+def evaluate_scenarios(df_scored: pd.DataFrame, weights: pd.DataFrame,
+                       top_n: int = 20) -> Dict:
+    """
+    Score every weight scenario in one pass
+
+    weights: DataFrame (scenarios x score columns), e.g. from random_weights.
+    Rows are normalized to sum to 1 so composites stay on 0-100.
+
+    Returns dict with:
+    - scores: (stocks x scenarios) float32 composite scores
+    - ranks: DataFrame of ranks, tickers x scenarios
+    - stability: per-ticker mean/std/best/worst rank and share of scenarios in the top N,
+      sorted by mean rank
+    - rank_correlation: Spearman correlation of each scenario's ranking with scenario 0
+    - always_top_n: tickers in the top N in every scenario
+    """
+    matrix = score_matrix(df_scored, list(weights.columns))
+    w = weights.to_numpy(dtype='float32')
+    w = w / w.sum(axis=1, keepdims=True)
+
+    # (stocks x factors) @ (factors x scenarios)
+    scores = matrix @ w.T
+    ranks = rank_scores(scores)
+    n_stocks = len(matrix)
+
+    in_top = ranks <= top_n
+    top_share = in_top.mean(axis=1)
+
+    stability = pd.DataFrame({
+        'ticker': df_scored['ticker'].to_numpy(),
+        'mean_rank': ranks.mean(axis=1),
+        'rank_std': ranks.std(axis=1),
+        'best_rank': ranks.min(axis=1),
+        'worst_rank': ranks.max(axis=1),
+        'top_n_share': top_share,
+    }).sort_values('mean_rank').reset_index(drop=True)
+
+    # Spearman correlation with the first scenario (ranks have no ties)
+    if n_stocks > 1:
+        centred = ranks - (n_stocks + 1) / 2
+        base = centred[:, :1]
+        rank_correlation = (centred * base).sum(axis=0) / (base ** 2).sum()
+    else:
+        rank_correlation = np.ones(ranks.shape[1])
+
+    return {
+        'scores': scores,
+        'ranks': pd.DataFrame(ranks, index=df_scored['ticker'].to_numpy(), columns=weights.index),
+        'stability': stability,
+        'rank_correlation': pd.Series(rank_correlation, index=weights.index),
+        'always_top_n': df_scored['ticker'].to_numpy()[in_top.all(axis=1)].tolist(),
+    }
+
+
+def run_sensitivity(df_scored: pd.DataFrame, n_scenarios: int = 1000, top_n: int = 20,
+                    concentration: float = 20.0, seed: int = 0) -> Dict:
+    """Evaluate n_scenarios random weightings around the current SCORE_WEIGHTS"""
+    weights = random_weights(n_scenarios, concentration=concentration, seed=seed)
+    return evaluate_scenarios(df_scored, weights, top_n=top_n)
+
+
+if __name__ == "__main__":
+    # Sweep 1,000 weightings over the latest stored snapshot
+    from snapshot_store import load_latest_snapshot
+
+    df_scored = load_latest_snapshot()
+    if df_scored is None:
+        print("No stored snapshot found - run an analysis first")
+        raise SystemExit(1)
+
+    start = time.perf_counter()
+    result = run_sensitivity(df_scored, n_scenarios=1000)
+    elapsed = time.perf_counter() - start
+
+    print(f"Evaluated 1000 scenarios over {len(df_scored)} stocks in {elapsed*1000:.0f} ms")
+    print(f"Median rank correlation with base weights: {result['rank_correlation'].median():.3f}")
+    print(f"Always in top 20: {', '.join(result['always_top_n']) or 'none'}")
+    print("\nMost stable leaders:")
+    print(result['stability'].head(20).to_string(index=False))